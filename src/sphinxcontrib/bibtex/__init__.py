@@ -25,6 +25,7 @@ def setup(app: Sphinx) -> Dict[str, Any]:
     """Set up the bibtex extension:
 
     * register config values
+    * register events
     * register directives
     * register nodes
     * register roles
@@ -36,6 +37,13 @@ def setup(app: Sphinx) -> Dict[str, Any]:
     app.add_config_value("bibtex_tooltips_style", "", "html")
     app.add_config_value("bibtex_bibfiles", None, "html")
     app.add_config_value("bibtex_encoding", "utf-8-sig", "html")
+    app.add_config_value("bibtex_cache_dir", None, "")
+    app.add_config_value("bibtex_cache_size", 2**30, "")
+    app.add_config_value("bibtex_parse_jobs", 1, "")
+    app.add_config_value("bibtex_parse_background", False, "")
+    app.add_config_value("bibtex_lazy_parsing", False, "")
+    app.add_config_value("bibtex_prune_entries", False, "")
+    app.add_config_value("bibtex_check_duplicates", False, "")
     app.add_config_value("bibtex_bibliography_header", "", "html")
     app.add_config_value("bibtex_footbibliography_header", "", "html")
     app.add_config_value("bibtex_reference_style", "label", "env")
@@ -44,6 +52,7 @@ def setup(app: Sphinx) -> Dict[str, Any]:
     app.add_config_value("bibtex_footcite_id", "", "html")
     app.add_config_value("bibtex_bibliography_id", "", "html")
     app.add_config_value("bibtex_footbibliography_id", "", "html")
+    app.add_event("bibtex-entries-changed")
     app.add_domain(BibtexDomain)
     app.add_directive("bibliography", BibliographyDirective)
     app.add_role("cite", CiteRole())
@@ -56,7 +65,7 @@ def setup(app: Sphinx) -> Dict[str, Any]:
 
     return {
         "version": version("sphinxcontrib-bibtex"),
-        "env_version": 9,
+        "env_version": 16,
         "parallel_read_safe": True,
         "parallel_write_safe": True,
     }
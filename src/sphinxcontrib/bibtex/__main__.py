@@ -0,0 +1,31 @@
+"""
+    Command line interface to compile bib files, for instance::
+
+        python -m sphinxcontrib.bibtex refs.bib
+
+    .. autofunction:: main
+"""
+
+import argparse
+from typing import List, Optional
+
+from .bibfile import compile_bibfile
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    """Compile the bib files given on the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m sphinxcontrib.bibtex",
+        description="Compile bib files, so they can be loaded without parsing.",
+    )
+    parser.add_argument("bibfiles", nargs="+", help="bib files to compile")
+    parser.add_argument(
+        "--encoding", default="utf-8-sig", help="encoding of the bib files"
+    )
+    options = parser.parse_args(args)
+    for bibfilename in options.bibfiles:
+        print(compile_bibfile(bibfilename, options.encoding))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,22 +7,107 @@
     .. autoclass:: BibData
         :members:
 
+    .. autoclass:: BibDataRef
+        :members:
+
+    .. autoclass:: EntryChanges
+        :members:
+
+    .. autoclass:: BibCache
+        :members:
+
     .. autofunction:: normpath_filename
 
+    .. autofunction:: expand_filename
+
+    .. autofunction:: parse_bibfile
+
+    .. autofunction:: get_compiled_filename
+
+    .. autofunction:: compile_bibfile
+
+    .. autofunction:: load_compiled_bibfile
+
     .. autofunction:: parse_bibdata
 
     .. autofunction:: is_bibdata_outdated
 
+    .. autofunction:: get_bibdata_ref
+
+    .. autofunction:: get_entry_changes
+
+    .. autofunction:: load_bibdata
+
+    .. autofunction:: save_bibdata
+
     .. autofunction:: process_bibdata
+
+    .. autoclass:: BibDataProcess
+        :members:
 """
+import glob
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import logging
+import lzma
 import math
+import mmap
 import os.path
-from typing import TYPE_CHECKING, Dict, List, NamedTuple, Set
+import pickle
+import re
+import sqlite3
+import sys
+import tempfile
+import weakref
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
+import pybtex
 from docutils.nodes import make_id
-from pybtex.database import BibliographyData, BibliographyDataError
-from pybtex.database.input.bibtex import Parser
-from sphinx.util.logging import getLogger
+from pybtex import textutils
+from pybtex.bibtex.utils import split_name_list
+from pybtex.database import BibliographyData, BibliographyDataError, Entry, Person
+from pybtex.database.input.bibtex import DuplicateField, Parser, month_names
+from pybtex.exceptions import PybtexError
+from pybtex.utils import CaseInsensitiveDict
+from sphinx.util.logging import NAMESPACE, LogCollector, getLogger
+
+from .duplicates import find_duplicates
+from .richtext import RichFields
+
+try:
+    from compression import zstd as _zstd  # type: ignore # Python 3.14 and later
+except ImportError:
+    try:
+        import zstandard as _zstd  # type: ignore
+    except ImportError:
+        _zstd = None
 
 if TYPE_CHECKING:
     from sphinx.environment import BuildEnvironment
@@ -30,12 +115,26 @@ if TYPE_CHECKING:
 
 logger = getLogger(__name__)
 
+#: Version of the format in which parsed data is stored on disk.
+#: Increase whenever :class:`BibFile` or the classes it uses change.
+_FORMAT_VERSION = 4
+
 
 class BibFile(NamedTuple):
     """Contains information about a parsed bib file."""
 
     mtime: float  #: Modification time of file when last parsed.
+    digest: str  #: Hash of the file contents when last parsed.
     keys: Dict[str, None]  #: Set of keys for this bib file as ordered dict.
+    data: BibliographyData  #: Data parsed from this bib file alone.
+    macros: Dict[str, str]  #: Macros defined by this bib file.
+    #: Macros defined elsewhere that were used when parsing this bib file,
+    #: along with their values at that time (``None`` if undefined).
+    used_macros: Dict[str, Optional[str]]
+    #: Maps key of each entry with a crossref field to the key of its parent.
+    crossrefs: Dict[str, str]
+    #: Maps lower case key of each entry to a hash of its contents.
+    fingerprints: Dict[str, str]
 
 
 class BibData(NamedTuple):
@@ -44,6 +143,158 @@ class BibData(NamedTuple):
     encoding: str  #: Encoding of all bib files.
     bibfiles: Dict[str, BibFile]  #: Maps bib filename to information about it.
     data: BibliographyData  #: Data parsed from all bib files.
+    #: Groups of keys of duplicate or nearly identical entries,
+    #: if these were looked for.
+    duplicates: Tuple[Tuple[str, ...], ...] = ()
+
+
+class BibDataRef(NamedTuple):
+    """Refers to bibliography data which is stored in a separate file,
+    and contains what is needed to check whether the data is up to date
+    without loading it.
+    """
+
+    token: str  #: Hash identifying the stored data.
+    encoding: str  #: Encoding of all bib files.
+    lazy: bool  #: Whether entries are parsed only when they are needed.
+    #: Maps bib filename to its modification time and hash of its contents.
+    bibfiles: Dict[str, Tuple[float, str]]
+    #: Whether duplicate and nearly identical entries were looked for.
+    duplicates: bool = False
+
+
+class EntryChanges(NamedTuple):
+    """Keys of the entries which changed since the bib files were
+    last processed.
+    """
+
+    added: Set[str]  #: Keys of new entries.
+    modified: Set[str]  #: Keys of entries whose contents changed.
+    removed: Set[str]  #: Keys of entries which no longer exist.
+
+
+def _dump_pickle(filename: str, *objs) -> None:
+    """Pickle *objs*, one after the other, into *filename*.
+    The file is written atomically,
+    so concurrent readers never see a partially written file.
+    """
+    fd, tmpfilename = tempfile.mkstemp(
+        dir=os.path.dirname(filename) or None, suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as stream:
+            for obj in objs:
+                pickle.dump(obj, stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpfilename, filename)
+    except BaseException:
+        os.remove(tmpfilename)
+        raise
+
+
+class BibCache(NamedTuple):
+    """Persistent cache of parsed bib files, which can be shared between
+    builds and between projects.
+    Parsed bib files are stored by the hash of their contents.
+    When the cache grows too large,
+    the least recently used parsed bib files are removed.
+    """
+
+    dirname: str  #: Directory where parsed bib files are stored.
+    max_size: int  #: Maximum total size of the cache, in bytes.
+
+    def get_filename(self, digest: str, encoding: str, lazy: bool = False) -> str:
+        """Return cache file name for a bib file with given hash *digest*
+        and *encoding*, parsed lazily if *lazy* is ``True``.
+        """
+        key = repr(
+            (
+                digest,
+                encoding,
+                lazy,
+                _FORMAT_VERSION,
+                pybtex.__version__,
+                sys.version_info[:2],
+            )
+        )
+        name = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.dirname, name + ".pickle")
+
+    def load(
+        self, digest: str, encoding: str, lazy: bool = False
+    ) -> Optional[BibFile]:
+        """Return the parsed bib file with given hash *digest* and *encoding*,
+        parsed lazily if *lazy* is ``True``,
+        or ``None`` if it is not in the cache.
+        """
+        filename = self.get_filename(digest, encoding, lazy)
+        try:
+            with open(filename, "rb") as stream:
+                bibfile = pickle.load(stream)
+        except FileNotFoundError:
+            return None
+        except Exception as exc:  # corrupt or incompatible cache file
+            logger.warning(
+                "could not load bibtex cache file {0}: {1}".format(filename, exc),
+                type="bibtex",
+                subtype="cache_error",
+            )
+            return None
+        try:
+            # mark as recently used
+            os.utime(filename)
+        except OSError:  # read only cache
+            pass
+        return bibfile if isinstance(bibfile, BibFile) else None
+
+    def store(
+        self, digest: str, encoding: str, bibfile: BibFile, lazy: bool = False
+    ) -> None:
+        """Store the parsed *bibfile* with given hash *digest* and *encoding*,
+        parsed lazily if *lazy* is ``True``.
+        The file is written atomically, so concurrent builds
+        can safely share the cache.
+        Call :meth:`evict` once all bib files are stored.
+        """
+        filename = self.get_filename(digest, encoding, lazy)
+        try:
+            os.makedirs(self.dirname, exist_ok=True)
+            _dump_pickle(filename, bibfile)
+        except OSError as exc:
+            logger.warning(
+                "could not store bibtex cache file {0}: {1}".format(filename, exc),
+                type="bibtex",
+                subtype="cache_error",
+            )
+
+    def evict(self) -> None:
+        """Remove least recently used cache files until the total size of
+        the cache is at most :attr:`max_size`.
+        """
+        stats = _get_cache_stats(self.dirname)
+        size = sum(stat.st_size for stat, _ in stats)
+        for stat, filename in sorted(stats, key=lambda item: item[0].st_mtime):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(filename)
+            except FileNotFoundError:  # removed by concurrent build
+                pass
+            size -= stat.st_size
+
+
+def _get_cache_stats(dirname: str) -> List[Tuple[os.stat_result, str]]:
+    stats = []
+    try:
+        with os.scandir(dirname) as dir_entries:
+            for dir_entry in dir_entries:
+                if dir_entry.name.endswith(".pickle"):
+                    try:
+                        stats.append((dir_entry.stat(), dir_entry.path))
+                    except FileNotFoundError:  # removed by concurrent build
+                        pass
+    except FileNotFoundError:  # nothing stored yet
+        pass
+    return stats
 
 
 def normpath_filename(env: "BuildEnvironment", filename: str) -> str:
@@ -51,6 +302,80 @@ def normpath_filename(env: "BuildEnvironment", filename: str) -> str:
     return os.path.normpath(env.relfn2path(filename.strip())[1])
 
 
+def expand_filename(filename: str) -> List[str]:
+    """Return the bib files that *filename* refers to, in sorted order:
+    all files that match *filename* if it is a glob pattern,
+    all bib files in *filename* and its subdirectories if it is a directory,
+    including compressed ones,
+    and *filename* itself otherwise.
+    """
+    if glob.escape(filename) != filename:
+        patterns = [filename]
+    elif os.path.isdir(filename):
+        patterns = [
+            os.path.join(glob.escape(filename), "**", "*.bib" + suffix)
+            for suffix in ["", *_DECOMPRESSORS]
+        ]
+    else:
+        return [filename]
+    return sorted(
+        os.path.normpath(name)
+        for pattern in patterns
+        for name in glob.glob(pattern, recursive=True)
+        if os.path.isfile(name)
+    )
+
+
+def _open_zstd(filename: str) -> BinaryIO:
+    if _zstd is None:
+        raise ImportError("zstandard is required to read {0}".format(filename))
+    return _zstd.open(filename, "rb")
+
+
+#: Maps suffix of compressed bib files to function opening them for reading.
+_DECOMPRESSORS: Dict[str, Callable[[str], BinaryIO]] = {
+    ".gz": lambda filename: cast(BinaryIO, gzip.open(filename, "rb")),
+    ".xz": lambda filename: cast(BinaryIO, lzma.open(filename, "rb")),
+    ".zst": _open_zstd,
+}
+_DECOMPRESSION_ERRORS = (ImportError, OSError, EOFError, lzma.LZMAError) + (
+    (_zstd.ZstdError,) if _zstd is not None else ()
+)
+
+
+def _get_decompressor(bibfilename: str) -> Optional[Callable[[str], BinaryIO]]:
+    return _DECOMPRESSORS.get(os.path.splitext(bibfilename)[1].lower())
+
+
+def _is_json(bibfilename: str) -> bool:
+    name, suffix = os.path.splitext(bibfilename.lower())
+    if suffix in _DECOMPRESSORS:
+        suffix = os.path.splitext(name)[1]
+    return suffix == ".json"
+
+
+def _is_lazy(bibfilename: str, lazy: bool) -> bool:
+    """Only plain bib files can be scanned, so compressed bib files
+    and JSON files are always fully parsed.
+    """
+    return (
+        lazy and _get_decompressor(bibfilename) is None and not _is_json(bibfilename)
+    )
+
+
+def _read_text(bibfilename: str, encoding: str) -> str:
+    """Read *bibfilename*, decompressing it as it is read if it is compressed."""
+    decompressor = _get_decompressor(bibfilename)
+    binary_stream = (
+        open(bibfilename, "rb") if decompressor is None else decompressor(bibfilename)
+    )
+    with io.TextIOWrapper(binary_stream, encoding=encoding) as stream:
+        try:
+            return stream.read()
+        except UnicodeDecodeError as exc:
+            raise PybtexError(str(exc), filename=bibfilename)
+
+
 def get_mtime(bibfilename: str) -> float:
     try:
         return os.path.getmtime(bibfilename)
@@ -58,61 +383,1556 @@ def get_mtime(bibfilename: str) -> float:
         return -math.inf
 
 
-def parse_bibdata(bibfilenames: List[str], encoding: str) -> BibData:
-    """Parse *bibfilenames* with given *encoding*, and return parsed data."""
+def get_digest(bibfilename: str) -> str:
+    hash_ = hashlib.blake2b(digest_size=16)
+    try:
+        with open(bibfilename, "rb") as stream:
+            for chunk in iter(lambda: stream.read(1 << 20), b""):
+                hash_.update(chunk)
+    except OSError:
+        return ""
+    return hash_.hexdigest()
+
+
+def _get_fingerprint(*parts: Union[bytes, str]) -> str:
+    """Return a hash of *parts*, which identifies the contents of an entry."""
+    hash_ = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        hash_.update(part if isinstance(part, bytes) else part.encode("utf-8"))
+        hash_.update(b"\0")
+    return hash_.hexdigest()
+
+
+def _get_macros_fingerprint(macros: Dict[str, str]) -> str:
+    return _get_fingerprint(repr(sorted(macros.items())))
+
+
+class _MacroTable(CaseInsensitiveDict):
+    """Macro table which keeps track of the macros that are defined,
+    and of the macros that are used but defined elsewhere.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.defined: Dict[str, str] = {}
+        self.used: Dict[str, Optional[str]] = {}
+        super().__init__(*args, **kwargs)
+        self.defined.clear()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.defined[key.lower()] = value
+
+    def __getitem__(self, key):
+        try:
+            value = super().__getitem__(key)
+        except KeyError:
+            self._note_used(key, None)
+            raise
+        self._note_used(key, value)
+        return value
+
+    def _note_used(self, key: str, value: Optional[str]) -> None:
+        key_lower = key.lower()
+        if key_lower not in self.defined:
+            self.used.setdefault(key_lower, value)
+
+
+class _Parser(Parser):
+    """Parser which parses every distinct name only once,
+    and shares the resulting person between all entries
+    that have the same name.
+    """
+
+    def __init__(self, *args, persons: Optional[Dict[str, Person]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        #: Maps name, as it appears in the bib file, to person.
+        self.persons: Dict[str, Person] = {} if persons is None else persons
+
+    def get_person(self, name: str) -> Person:
+        person = self.persons.get(name)
+        if person is None:
+            person = self.persons[name] = Person(name)
+        return person
+
+    # copied from pybtex Parser but using get_person
+    def process_entry(self, entry_type, key, fields):
+        entry = Entry(entry_type)
+
+        if key is None:
+            key = f"unnamed-{self.unnamed_entry_counter}"
+            self.unnamed_entry_counter += 1
+
+        seen_fields = set()
+        for field_name, field_value_list in fields:
+            if field_name.lower() in seen_fields:
+                self.handle_error(DuplicateField(key, field_name))
+                continue
+
+            field_value = textutils.normalize_whitespace(
+                self.flatten_value_list(field_value_list)
+            )
+            if field_name in self.person_fields:
+                for name in split_name_list(field_value):
+                    entry.add_person(self.get_person(name), field_name)
+            else:
+                entry.fields[field_name] = field_value
+            seen_fields.add(field_name.lower())
+        self.data.add_entry(key, entry)
+
+
+def _add_rich_fields(entry: Entry) -> Entry:
+    """Give *entry* the rich text of its fields, as :attr:`rich_fields`,
+    so identical field values of all entries are parsed only once.
+    """
+    if "rich_fields" not in entry.__dict__:
+        entry.rich_fields = RichFields(entry.fields)
+    return entry
+
+
+def _resolve_crossref(entry: Entry, parent: Entry) -> Entry:
+    """Return copy of *entry* which also has the fields and persons
+    of *parent* that *entry* does not have itself, as BibTeX does.
+    """
+    resolved = Entry(
+        entry.original_type,
+        fields=list(entry.fields.items())
+        + [item for item in parent.fields.items() if item[0] not in entry.fields],
+        persons=list(entry.persons.items())
+        + [item for item in parent.persons.items() if item[0] not in entry.persons],
+    )
+    resolved.key = entry.key
+    return resolved
+
+
+class _MergedEntries(Mapping[str, Entry]):
+    """Case insensitive mapping of keys to entries, looking up each entry
+    in the entries of the bib file it comes from.
+    Entries with a crossref field inherit the fields and persons of
+    their parent, as found through the crossref index.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[str, Mapping[str, Entry]]] = {}
+        #: Maps lower case key of each entry to the key of its parent.
+        self.crossrefs: Dict[str, str] = {}
+        self._resolved: "weakref.WeakValueDictionary[str, Entry]" = (
+            weakref.WeakValueDictionary()
+        )
+
+    def __getstate__(self):
+        return self._entries, self.crossrefs
+
+    def __setstate__(self, state):
+        self._entries, self.crossrefs = state
+        self._resolved = weakref.WeakValueDictionary()
+
+    def add(
+        self, key: str, entries: Mapping[str, Entry], crossref: Optional[str]
+    ) -> None:
+        self._entries[key.lower()] = (key, entries)
+        if crossref is not None:
+            self.crossrefs[key.lower()] = crossref
+
+    def __getitem__(self, key: str) -> Entry:
+        key_lower = key.lower()
+        key2, entries = self._entries[key_lower]
+        parent_key = self.crossrefs.get(key_lower)
+        if parent_key is None or parent_key.lower() not in self._entries:
+            return _add_rich_fields(entries[key2])
+        entry = self._resolved.get(key_lower)
+        if entry is None:
+            parent_key2, parent_entries = self._entries[parent_key.lower()]
+            entry = self._resolved[key_lower] = _resolve_crossref(
+                entries[key2], parent_entries[parent_key2]
+            )
+        return _add_rich_fields(entry)
+
+    def __contains__(self, key) -> bool:
+        return key.lower() in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key, _ in self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_PERSON_PARTS = (
+    "first_names",
+    "middle_names",
+    "prelast_names",
+    "last_names",
+    "lineage_names",
+)
+_MAX_INTERN_LENGTH = 64
+
+
+def _intern(value: str) -> str:
+    """Intern short strings, such as field names, years, and journal
+    names, so that all entries share a single copy of them.
+    """
+    return sys.intern(value) if len(value) <= _MAX_INTERN_LENGTH else value
+
+
+#: Parts of the name of a person, in the order of :data:`_PERSON_PARTS`.
+_PersonRecord = Tuple[Tuple[str, ...], ...]
+
+
+class _EntryRecord(NamedTuple):
+    """Compact record of a bibliography entry."""
+
+    key: str
+    type: str  #: Entry type, in its original case.
+    fields: Tuple[str, ...]  #: Field names and values, alternating.
+    persons: Tuple[Tuple[str, Tuple[_PersonRecord, ...]], ...]  #: Persons by role.
+
+
+def _make_person_record(
+    person: Person, person_records: Dict[_PersonRecord, _PersonRecord]
+) -> _PersonRecord:
+    record = tuple(
+        tuple(_intern(name) for name in getattr(person, part))
+        for part in _PERSON_PARTS
+    )
+    return person_records.setdefault(record, record)
+
+
+def _make_record(
+    key: str, entry: Entry, person_records: Dict[_PersonRecord, _PersonRecord]
+) -> _EntryRecord:
+    return _EntryRecord(
+        key=key,
+        type=_intern(entry.original_type),
+        fields=tuple(
+            _intern(item) for field in entry.fields.items() for item in field
+        ),
+        persons=tuple(
+            (
+                _intern(role),
+                tuple(
+                    _make_person_record(person, person_records) for person in persons
+                ),
+            )
+            for role, persons in entry.persons.items()
+        ),
+    )
+
+
+#: Persons in use, so entries with the same person share it.
+_persons: "weakref.WeakValueDictionary[_PersonRecord, Person]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def _make_person(parts: _PersonRecord) -> Person:
+    person = _persons.get(parts)
+    if person is None:
+        person = _persons[parts] = Person()
+        for part, names in zip(_PERSON_PARTS, parts):
+            setattr(person, part, list(names))
+    return person
+
+
+def _make_entry(record: _EntryRecord) -> Entry:
+    fields = record.fields
+    entry = Entry(
+        record.type,
+        fields=list(zip(fields[::2], fields[1::2])),
+        persons=[
+            (role, [_make_person(parts) for parts in persons])
+            for role, persons in record.persons
+        ],
+    )
+    entry.key = record.key
+    return entry
+
+
+class _CompactEntries(Mapping[str, Entry]):
+    """Case insensitive mapping of keys to entries of a bib file,
+    storing each entry as a compact record, and building the entry
+    itself whenever it is looked up.
+    Entries are kept for as long as they are in use elsewhere,
+    so looking up the same key twice gives the same entry.
+    """
+
+    def __init__(self, entries: Mapping[str, Entry]):
+        #: Maps lower case key to record.
+        person_records: Dict[_PersonRecord, _PersonRecord] = {}
+        self.records: Dict[str, _EntryRecord] = {
+            key.lower(): _make_record(key, entry, person_records)
+            for key, entry in entries.items()
+        }
+        self._views: "weakref.WeakValueDictionary[str, Entry]" = (
+            weakref.WeakValueDictionary()
+        )
+
+    def __getstate__(self):
+        return self.records
+
+    def __setstate__(self, state):
+        self.records = state
+        self._views = weakref.WeakValueDictionary()
+
+    def __getitem__(self, key: str) -> Entry:
+        key_lower = key.lower()
+        entry = self._views.get(key_lower)
+        if entry is None:
+            entry = self._views[key_lower] = _make_entry(self.records[key_lower])
+        return entry
+
+    def __contains__(self, key) -> bool:
+        return key.lower() in self.records
+
+    def __iter__(self) -> Iterator[str]:
+        return (record.key for record in self.records.values())
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+def _parse_entry(
+    bibfilename: str,
+    encoding: str,
+    macros: Dict[str, str],
+    persons: Dict[str, Person],
+    key: str,
+    text: str,
+) -> Entry:
+    """Parse the entry with *key* from *text*, taken from *bibfilename*."""
+    parser = _Parser(encoding, macros=macros, persons=persons)
+    try:
+        parser.parse_string(text)
+    except PybtexError as exc:
+        logger.warning(
+            "bibliography data error in {0}: {1}".format(bibfilename, exc),
+            type="bibtex",
+            subtype="bibfile_data_error",
+        )
+    entry = parser.data.entries.get(key)
+    if entry is None:  # rejected by pybtex, as reported above
+        entry = Entry("misc")
+        entry.key = key
+    return entry
+
+
+class _UnboundEntries:
+    """Entries which are read from a bib file when they are looked up.
+    The name of the bib file is left out when the entries are pickled,
+    so entries which are shared through the cache are never read from
+    another copy of the bib file: it is set again by :func:`_bind_bibfile`.
+    """
+
+    bibfilename: str
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["bibfilename"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.bibfilename = ""
+
+
+class _LazyEntries(_UnboundEntries, Mapping[str, Entry]):
+    """Case insensitive mapping of keys to entries of a bib file,
+    parsing each entry from its location in the file
+    only when it is first looked up.
+    """
+
+    def __init__(
+        self,
+        bibfilename: str,
+        encoding: str,
+        macros: Dict[str, str],
+        spans: Dict[str, Tuple[str, int, int]],
+    ):
+        self.bibfilename = bibfilename
+        self.encoding = encoding
+        self.macros = macros  #: Macros available to the entries.
+        self.spans = spans  #: Maps lower case key to key, start, and end.
+        self.entries: Dict[str, Entry] = {}  #: Entries parsed so far.
+        self.persons: Dict[str, Person] = {}  #: Persons parsed so far.
+
+    def __getitem__(self, key: str) -> Entry:
+        key_lower = key.lower()
+        try:
+            return self.entries[key_lower]
+        except KeyError:
+            pass
+        key2, start, end = self.spans[key_lower]
+        with open(self.bibfilename, "rb") as stream:
+            stream.seek(start)
+            text = stream.read(end - start).decode(self.encoding)
+        entry = self.entries[key_lower] = _parse_entry(
+            self.bibfilename, self.encoding, self.macros, self.persons, key2, text
+        )
+        return entry
+
+    def __contains__(self, key) -> bool:
+        return key.lower() in self.spans
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key, _, _ in self.spans.values())
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+
+_DATABASE_MAGIC = b"SQLite format 3\x00"
+
+
+def _is_database(bibfilename: str) -> bool:
+    try:
+        with open(bibfilename, "rb") as stream:
+            return stream.read(len(_DATABASE_MAGIC)) == _DATABASE_MAGIC
+    except OSError:
+        return False
+
+
+def _connect_database(bibfilename: str) -> sqlite3.Connection:
+    uri = Path(os.path.abspath(bibfilename)).as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True)
+
+
+class _DatabaseEntries(_UnboundEntries, Mapping[str, Entry]):
+    """Case insensitive mapping of keys to entries of an SQLite database,
+    querying and parsing each entry only when it is first looked up.
+    All queries share one connection, which is opened on the first query.
+    """
+
+    def __init__(self, bibfilename: str, macros: Dict[str, str], keys: Dict[str, str]):
+        self.bibfilename = bibfilename
+        self.macros = macros  #: Macros available to the entries.
+        self.original_keys = keys  #: Maps lower case key to key.
+        self.entries: Dict[str, Entry] = {}  #: Entries parsed so far.
+        self.persons: Dict[str, Person] = {}  #: Persons parsed so far.
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = 0  # process which opened the connection
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        del state["_connection"]
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._connection = None
+
+    def _get_connection(self) -> sqlite3.Connection:
+        # connections cannot be shared with forked processes
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = _connect_database(self.bibfilename)
+            self._pid = os.getpid()
+        return self._connection
+
+    def __getitem__(self, key: str) -> Entry:
+        key_lower = key.lower()
+        try:
+            return self.entries[key_lower]
+        except KeyError:
+            pass
+        key2 = self.original_keys[key_lower]
+        row = (
+            self._get_connection()
+            .execute("SELECT bibtex FROM entries WHERE key = ?", (key2,))
+            .fetchone()
+        )
+        if row is None:  # database changed since its keys were read
+            raise KeyError(key)
+        entry = self.entries[key_lower] = _parse_entry(
+            self.bibfilename, "utf-8", self.macros, self.persons, key2, row[0]
+        )
+        return entry
+
+    def __contains__(self, key) -> bool:
+        return key.lower() in self.original_keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.original_keys.values())
+
+    def __len__(self) -> int:
+        return len(self.original_keys)
+
+
+_COMMAND = re.compile(rb"@[ \t\r\n]*([^\s{(]+)[ \t\r\n]*([{(])")
+_ENTRY_KEY_BRACE = re.compile(rb"[ \t\r\n]*([^\s,}]+)")
+_ENTRY_KEY_PAREN = re.compile(rb"[ \t\r\n]*([^\s,]+)")
+_BRACE_DELIMITERS = re.compile(rb"[{}]")
+_PAREN_DELIMITERS = re.compile(rb'[{}()"]')
+_MACRO_NAME = re.compile(rb'[=#][ \t\r\n]*([^\s\d"#%\'(){}=,][^\s"#%\'(){}=,]*)')
+_CROSSREF = re.compile(
+    rb'[\s,]crossref[ \t\r\n]*=[ \t\r\n]*["{]([^"{}]*)["}]', re.IGNORECASE
+)
+
+
+def _find_command_end(buffer, pos: int, paren: bool) -> int:
+    """Return the position just after the end of the command whose
+    body starts at *pos*, delimited either by parentheses or by braces.
+    """
+    depth = 0
+    quoted = False
+    delimiters = _PAREN_DELIMITERS if paren else _BRACE_DELIMITERS
+    for match in delimiters.finditer(buffer, pos):
+        char = match.group()
+        if char == b"{":
+            depth += 1
+        elif char == b"}":
+            if depth == 0:
+                return match.end()
+            depth -= 1
+        elif depth == 0:
+            if char == b'"':
+                quoted = not quoted
+            elif char == b")" and not quoted:
+                return match.end()
+    return len(buffer)
+
+
+def _scan_commands(
+    buffer, encoding: str
+) -> Iterator[Tuple[str, Optional[str], int, int]]:
+    """Yield the lower case command name, the entry key (if any),
+    and the start and end position, of each command in *buffer*.
+    Comment commands are skipped, but their body is scanned,
+    as does pybtex.
+    """
+    pos = 0
+    while True:
+        match = _COMMAND.search(buffer, pos)
+        if match is None:
+            return
+        command = match.group(1).decode("ascii", "replace").lower()
+        if command == "comment":
+            pos = match.end()
+            continue
+        paren = match.group(2) == b"("
+        key: Optional[str] = None
+        if command not in {"string", "preamble"}:
+            key_pattern = _ENTRY_KEY_PAREN if paren else _ENTRY_KEY_BRACE
+            key_match = key_pattern.match(buffer, match.end())
+            if key_match is not None:
+                key = key_match.group(1).decode(encoding, "replace")
+        pos = _find_command_end(buffer, match.end(), paren)
+        yield command, key, match.start(), pos
+
+
+def _get_entry_macros(macros: _MacroTable, names: Set[str]) -> Dict[str, str]:
+    """Return the macros with given *names*, rather than all macros,
+    and note them as used, so changes to them are detected.
+    """
+    entry_macros: Dict[str, str] = {}
+    for name in sorted(names):
+        value = macros.get(name)
+        if value is not None:
+            entry_macros[name] = value
+    return entry_macros
+
+
+def _scan_bibfile(
+    bibfilename: str, encoding: str, macros: Dict[str, str]
+) -> Tuple[BibFile, List[Tuple[str, str]]]:
+    """Like :func:`_parse_bibfile`, but only find the location of each entry
+    in *bibfilename*, so entries can be parsed when they are needed.
+    String and preamble commands are parsed immediately.
+    """
+    warnings: List[Tuple[str, str]] = []
     parser = Parser(encoding)
-    bibfiles: Dict[str, BibFile] = {}
-    keys: Dict[str, None] = {}
+    parser.macros = _MacroTable(macros)
+    spans: Dict[str, Tuple[str, int, int]] = {}
+    digests: Dict[str, str] = {}  # hash of the text of each entry
+    other_commands: List[str] = []
+    names: Set[str] = set()  # names of macros that entries may use
+    crossrefs: Dict[str, str] = {}
+    buffer: Union[mmap.mmap, bytes]
+    with open(bibfilename, "rb") as stream:
+        try:
+            buffer = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mapped
+            buffer = b""
+        try:
+            for command, key, start, end in _scan_commands(buffer, encoding):
+                if key is None:
+                    other_commands.append(buffer[start:end].decode(encoding))
+                elif key.lower() in spans:
+                    warnings.append(
+                        (
+                            "bibliography data error in {0}: "
+                            "repeated bibliography entry: {1}".format(bibfilename, key),
+                            "bibfile_data_error",
+                        )
+                    )
+                else:
+                    spans[key.lower()] = (key, start, end)
+                    digests[key.lower()] = _get_fingerprint(buffer[start:end])
+                    names.update(
+                        match.group(1).decode(encoding, "replace").lower()
+                        for match in _MACRO_NAME.finditer(buffer, start, end)
+                    )
+                    crossref = _CROSSREF.search(buffer, start, end)
+                    if crossref is not None:
+                        crossrefs[key] = crossref.group(1).decode(encoding).strip()
+        finally:
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+    parser.parse_string("\n".join(other_commands))
+    entry_macros = _get_entry_macros(parser.macros, names)
+    entries = _LazyEntries(bibfilename, encoding, entry_macros, spans)
+    # entries are not parsed, so their text and macros identify them
+    macros_digest = _get_macros_fingerprint(entry_macros)
+    data = BibliographyData()
+    data.entries = entries
+    data.add_to_preamble(*parser.data.preamble_list)
+    bibfile = BibFile(
+        mtime=get_mtime(bibfilename),
+        digest=get_digest(bibfilename),
+        keys=dict.fromkeys(entries),
+        data=data,
+        macros=parser.macros.defined,
+        used_macros=parser.macros.used,
+        crossrefs=crossrefs,
+        fingerprints={
+            key: _get_fingerprint(digest, macros_digest)
+            for key, digest in digests.items()
+        },
+    )
+    return bibfile, warnings
+
+
+def _read_database(
+    bibfilename: str, macros: Dict[str, str]
+) -> Tuple[BibFile, List[Tuple[str, str]]]:
+    """Like :func:`_scan_bibfile`, but only read the keys of the entries
+    in the SQLite database *bibfilename*,
+    along with the entries which may have a crossref,
+    so entries can be queried and parsed when they are needed.
+    The entries are not read, so all macros are available to them,
+    and they are all considered changed when the database changes.
+    """
+    warnings: List[Tuple[str, str]] = []
+    table = _MacroTable(macros)
+    keys: Dict[str, str] = {}
+    crossrefs: Dict[str, str] = {}
+    try:
+        with closing(_connect_database(bibfilename)) as connection:
+            for (key,) in connection.execute("SELECT key FROM entries"):
+                if key.lower() in keys:
+                    warnings.append(
+                        (
+                            "bibliography data error in {0}: "
+                            "repeated bibliography entry: {1}".format(bibfilename, key),
+                            "bibfile_data_error",
+                        )
+                    )
+                    continue
+                keys[key.lower()] = key
+            for key, text in connection.execute(
+                "SELECT key, bibtex FROM entries WHERE bibtex LIKE '%crossref%'"
+            ):
+                crossref = _CROSSREF.search(text.encode("utf-8"))
+                if crossref is not None and key not in crossrefs:
+                    crossrefs[key] = crossref.group(1).decode("utf-8").strip()
+    except sqlite3.Error as exc:
+        warnings.append(
+            (
+                "could not read bibtex database {0}: {1}".format(bibfilename, exc),
+                "bibfile_error",
+            )
+        )
+    entry_macros = _get_entry_macros(table, {name.lower() for name in table})
+    entries = _DatabaseEntries(bibfilename, entry_macros, keys)
+    digest = get_digest(bibfilename)
+    fingerprint = _get_fingerprint(digest, _get_macros_fingerprint(entry_macros))
+    data = BibliographyData()
+    data.entries = entries
+    bibfile = BibFile(
+        mtime=get_mtime(bibfilename),
+        digest=digest,
+        keys=dict.fromkeys(entries),
+        data=data,
+        macros=table.defined,
+        used_macros=table.used,
+        crossrefs=crossrefs,
+        fingerprints={key: fingerprint for key in keys},
+    )
+    return bibfile, warnings
+
+
+#: Characters with a special meaning in bibtex field values,
+#: and how to write them literally.
+_LATEX_ESCAPES = str.maketrans(
+    {
+        "\\": r"\textbackslash{}",
+        "{": None,
+        "}": None,
+        "%": r"\%",
+        "&": r"\&",
+        "#": r"\#",
+        "_": r"\_",
+        "~": r"\textasciitilde{}",
+    }
+)
+
+
+def _escape_latex(value: Any) -> str:
+    return str(value).translate(_LATEX_ESCAPES)
+
+
+#: Maps CSL-JSON item types to bibtex entry types.
+_CSL_TYPES = {
+    "article": "article",
+    "article-journal": "article",
+    "article-magazine": "article",
+    "article-newspaper": "article",
+    "book": "book",
+    "chapter": "incollection",
+    "paper-conference": "inproceedings",
+    "report": "techreport",
+    "thesis": "phdthesis",
+    "manuscript": "unpublished",
+}
+
+#: Maps CSL-JSON variables to bibtex fields.
+_CSL_FIELDS = {
+    "title": "title",
+    "collection-title": "series",
+    "volume": "volume",
+    "issue": "number",
+    "number": "number",
+    "page": "pages",
+    "edition": "edition",
+    "publisher": "publisher",
+    "publisher-place": "address",
+    "DOI": "doi",
+    "URL": "url",
+    "ISBN": "isbn",
+    "ISSN": "issn",
+    "note": "note",
+    "abstract": "abstract",
+}
+
+
+def _make_csl_person(name: Dict[str, Any]) -> Person:
+    if "literal" in name:
+        return Person(last="{" + _escape_latex(name["literal"]) + "}")
+    particle = " ".join(
+        name[part]
+        for part in ["dropping-particle", "non-dropping-particle"]
+        if part in name
+    )
+    return Person(
+        first=_escape_latex(name.get("given", "")),
+        prelast=_escape_latex(particle),
+        last=_escape_latex(name.get("family", "")),
+        lineage=_escape_latex(name.get("suffix", "")),
+    )
+
+
+def _make_csl_entry(item: Dict[str, Any]) -> Entry:
+    type_ = _CSL_TYPES.get(item.get("type", ""), "misc")
+    fields = {
+        field: _escape_latex(item[variable])
+        for variable, field in _CSL_FIELDS.items()
+        if variable in item
+    }
+    if "container-title" in item:
+        container = "journal" if type_ == "article" else "booktitle"
+        fields[container] = _escape_latex(item["container-title"])
+    if "publisher" in item and type_ in {"phdthesis", "techreport"}:
+        fields["school" if type_ == "phdthesis" else "institution"] = fields.pop(
+            "publisher"
+        )
+    issued = item.get("issued", {})
+    date_parts = (issued.get("date-parts") or [[]])[0]
+    if date_parts:
+        fields["year"] = str(date_parts[0])
+        # numbers above 12 are seasons
+        month = str(date_parts[1]) if len(date_parts) >= 2 else ""
+        if month.isdigit() and 1 <= int(month) <= 12:
+            fields["month"] = list(month_names.values())[int(month) - 1]
+    elif "literal" in issued or "raw" in issued:
+        fields["year"] = _escape_latex(issued.get("literal", issued.get("raw")))
+    return Entry(
+        type_,
+        fields=fields,
+        persons={
+            role: [_make_csl_person(name) for name in item[role]]
+            for role in Person.valid_roles
+            if role in item
+        },
+    )
+
+
+def _make_bibjson_entry(record: Dict[str, Any]) -> Entry:
+    fields = {
+        name: _escape_latex(value)
+        for name, value in record.items()
+        if isinstance(value, (str, int))
+        and not isinstance(value, bool)
+        and name not in {"id", "citekey", "type"}
+    }
+    journal = record.get("journal")
+    if isinstance(journal, dict) and "name" in journal:
+        fields["journal"] = _escape_latex(journal["name"])
+    for identifier in record.get("identifier", []):
+        if "type" in identifier and "id" in identifier:
+            fields[identifier["type"].lower()] = _escape_latex(identifier["id"])
+    for link in record.get("link", [])[:1]:
+        url = link.get("url")
+        if url is not None:
+            fields.setdefault("url", _escape_latex(url))
+    return Entry(
+        record.get("type", "misc"),
+        fields=fields,
+        persons={
+            role: [
+                Person(_escape_latex(name["name"] if isinstance(name, dict) else name))
+                for name in record[role]
+            ]
+            for role in Person.valid_roles
+            if isinstance(record.get(role), list)
+        },
+    )
+
+
+def _parse_json(
+    data: BibliographyData, bibfilename: str, text: str
+) -> List[Tuple[str, str]]:
+    """Add the entries of the CSL-JSON or BibJSON bibliography *text*
+    to *data*, and return warning messages and their subtypes.
+    Records without a key, or with a key that was already used,
+    are skipped.
+    """
+    try:
+        items = json.loads(text)
+    except ValueError as exc:
+        raise BibliographyDataError("invalid json: {0}".format(exc))
+    records: List[Tuple[Any, Dict[str, Any], Callable[[Dict[str, Any]], Entry]]]
+    if isinstance(items, dict):  # BibJSON collection
+        records = [
+            (record.get("citekey", record.get("id")), record, _make_bibjson_entry)
+            for record in items.get("records", [])
+        ]
+    else:  # CSL-JSON items
+        records = [(item.get("id"), item, _make_csl_entry) for item in items]
+    warnings: List[Tuple[str, str]] = []
+    for key, record, make_entry in records:
+        if key is None or str(key) == "":
+            message = "bibliography entry without id"
+        elif str(key) in data.entries:
+            message = "repeated bibliography entry: {0}".format(key)
+        else:
+            data.add_entry(str(key), make_entry(record))
+            continue
+        warnings.append(
+            (
+                "bibliography data error in {0}: {1}".format(bibfilename, message),
+                "bibfile_data_error",
+            )
+        )
+    return warnings
+
+
+def _parse_bibfile(
+    bibfilename: str, encoding: str, macros: Dict[str, str], lazy: bool
+) -> Tuple[BibFile, List[Tuple[str, str]]]:
+    """Parse *bibfilename* with given *encoding* and *macros*,
+    and return parsed data along with warning messages and their subtypes.
+    If *lazy* is ``True``, entries are only parsed when they are needed.
+    SQLite databases of entries are always read lazily.
+    Files with a ``.json`` suffix are read as CSL-JSON or BibJSON.
+    Nothing is logged, so this function can run in a worker process.
+    """
+    if _is_database(bibfilename):
+        return _read_database(bibfilename, macros)
+    if _is_lazy(bibfilename, lazy) and os.path.isfile(bibfilename):
+        return _scan_bibfile(bibfilename, encoding, macros)
+    warnings: List[Tuple[str, str]] = []
+    parser = _Parser(encoding)
+    parser.macros = _MacroTable(macros)
+    if not os.path.isfile(bibfilename):
+        warnings.append(
+            ("could not open bibtex file {0}.".format(bibfilename), "bibfile_error")
+        )
+    else:
+        try:
+            if _is_json(bibfilename):
+                warnings.extend(
+                    _parse_json(
+                        parser.data, bibfilename, _read_text(bibfilename, encoding)
+                    )
+                )
+            elif _get_decompressor(bibfilename) is None:
+                parser.parse_file(bibfilename)
+            else:
+                parser.parse_string(_read_text(bibfilename, encoding))
+        except BibliographyDataError as exc:
+            warnings.append(
+                (
+                    "bibliography data error in {0}: {1}".format(bibfilename, exc),
+                    "bibfile_data_error",
+                )
+            )
+        except _DECOMPRESSION_ERRORS as exc:
+            warnings.append(
+                (
+                    "could not decompress bibtex file {0}: {1}".format(
+                        bibfilename, exc
+                    ),
+                    "bibfile_error",
+                )
+            )
+    crossrefs = {
+        key: entry.fields["crossref"]
+        for key, entry in parser.data.entries.items()
+        if "crossref" in entry.fields
+    }
+    entries = parser.data.entries = _CompactEntries(parser.data.entries)
+    bibfile = BibFile(
+        mtime=get_mtime(bibfilename),
+        digest=get_digest(bibfilename),
+        keys=dict.fromkeys(parser.data.entries.keys()),
+        data=parser.data,
+        macros=parser.macros.defined,
+        used_macros=parser.macros.used,
+        crossrefs=crossrefs,
+        fingerprints={
+            key: _get_fingerprint(repr(record))
+            for key, record in entries.records.items()
+        },
+    )
+    return bibfile, warnings
+
+
+def _report_bibfile(
+    bibfilename: str, bibfile: BibFile, warnings: List[Tuple[str, str]]
+) -> BibFile:
+    logger.info("parsing bibtex file {0}... ".format(bibfilename), nonl=True)
+    for message, subtype in warnings:
+        logger.warning(message, type="bibtex", subtype=subtype)
+    if bibfile.digest:
+        logger.info("parsed {0} entries".format(len(bibfile.data.entries)))
+    return bibfile
+
+
+def parse_bibfile(
+    bibfilename: str, encoding: str, macros: Dict[str, str], lazy: bool = False
+) -> BibFile:
+    """Parse *bibfilename* with given *encoding* and *macros*,
+    and return parsed data.
+    If *lazy* is ``True``, then only the location of each entry in the file
+    is recorded, and entries are parsed when they are first looked up.
+    The keys of the resulting bib file are not yet checked for
+    duplicates against other bib files.
+    """
+    return _report_bibfile(
+        bibfilename, *_parse_bibfile(bibfilename, encoding, macros, lazy)
+    )
+
+
+def _try_parse_bibfile(
+    bibfilename: str, encoding: str, macros: Dict[str, str], lazy: bool
+) -> Optional[Tuple[BibFile, List[Tuple[str, str]]]]:
+    try:
+        return _parse_bibfile(bibfilename, encoding, macros, lazy)
+    except PybtexError:
+        # for instance, an undefined macro if macros were guessed wrongly;
+        # the file will be parsed again so any error is reported properly
+        return None
+
+
+def _parse_bibfiles_parallel(
+    bibfilenames: List[str],
+    encoding: str,
+    macros: Dict[str, str],
+    lazy: bool,
+    jobs: int,
+) -> Dict[str, Optional[Tuple[BibFile, List[Tuple[str, str]]]]]:
+    """Parse *bibfilenames* in *jobs* worker processes, all using the
+    same *macros*. If worker processes are not supported, then
+    an empty dictionary is returned.
+    """
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = executor.map(
+                _try_parse_bibfile,
+                bibfilenames,
+                itertools.repeat(encoding),
+                itertools.repeat(dict(macros)),
+                itertools.repeat(lazy),
+            )
+            return dict(zip(bibfilenames, results))
+    except (ImportError, NotImplementedError, OSError, BrokenProcessPool):
+        return {}
+
+
+def _parse_bibfiles_speculative(
+    bibfilenames: List[str],
+    encoding: str,
+    old_bibfiles: Dict[str, BibFile],
+    cache: Optional[BibCache],
+    lazy: bool,
+    jobs: int,
+) -> Dict[str, Optional[Tuple[BibFile, List[Tuple[str, str]]]]]:
+    """Parse all modified bib files that are not compiled
+    and not in *cache* in parallel.
+    The macros defined before each bib file are only known once all
+    preceding bib files have been parsed,
+    so the macros from *old_bibfiles* are used instead.
+    Parsed bib files for which this guess turns out to be wrong
+    are parsed again later.
+    """
+    macros = CaseInsensitiveDict(month_names)
+    filenames = []
     for filename in bibfilenames:
-        logger.info("parsing bibtex file {0}... ".format(filename), nonl=True)
-        if not os.path.isfile(filename):
+        bibfile = old_bibfiles.get(filename)
+        if bibfile is not None:
+            macros.update(bibfile.macros)
+            if not _is_bibfile_modified(bibfile.mtime, bibfile.digest, filename):
+                continue
+        if not _is_lazy(filename, lazy) and os.path.isfile(
+            get_compiled_filename(filename)
+        ):
+            continue
+        if cache is not None and os.path.isfile(
+            cache.get_filename(
+                get_digest(filename), encoding, _is_lazy(filename, lazy)
+            )
+        ):
+            continue
+        filenames.append(filename)
+    if len(filenames) < 2:
+        return {}
+    return _parse_bibfiles_parallel(filenames, encoding, macros, lazy, jobs)
+
+
+_COMPILED_MAGIC = "sphinxcontrib-bibtex compiled bib file"
+
+
+def get_compiled_filename(bibfilename: str) -> str:
+    """Return name of the compiled file for *bibfilename*."""
+    return bibfilename + "c"
+
+
+def _get_compiled_header(encoding: str, digest: str) -> Tuple:
+    return (
+        _COMPILED_MAGIC,
+        _FORMAT_VERSION,
+        pybtex.__version__,
+        encoding,
+        digest,
+    )
+
+
+def compile_bibfile(bibfilename: str, encoding: str = "utf-8-sig") -> str:
+    """Parse *bibfilename* with given *encoding*, store the parsed data
+    in the compiled file for *bibfilename*, and return the name of
+    the compiled file.
+    Macros are assumed to be defined in *bibfilename* itself.
+    Bib files whose compiled file is up to date are loaded from it,
+    rather than parsed, unless entries are parsed lazily.
+    """
+    bibfile = parse_bibfile(bibfilename, encoding, CaseInsensitiveDict(month_names))
+    filename = get_compiled_filename(bibfilename)
+    with open(filename, "wb") as stream:
+        # header goes first, so it can be checked without loading the data
+        header = _get_compiled_header(encoding, bibfile.digest)
+        pickle.dump(header, stream, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(bibfile, stream, protocol=pickle.HIGHEST_PROTOCOL)
+    return filename
+
+
+def load_compiled_bibfile(
+    bibfilename: str, encoding: str, digest: str
+) -> Optional[BibFile]:
+    """Return the parsed data from the compiled file for *bibfilename*,
+    or ``None`` if there is no such file, or if it was compiled
+    with a different *encoding*, from contents with a different hash
+    than *digest*, or with different versions of pybtex or of
+    the compiled file format.
+    """
+    filename = get_compiled_filename(bibfilename)
+    try:
+        with open(filename, "rb") as stream:
+            header = pickle.load(stream)
+            if header != _get_compiled_header(encoding, digest):
+                logger.info("compiled bibtex file {0} is out of date".format(filename))
+                return None
+            bibfile = pickle.load(stream)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:  # corrupt file
+        logger.warning(
+            "could not load compiled bibtex file {0}: {1}".format(filename, exc),
+            type="bibtex",
+            subtype="bibfile_error",
+        )
+        return None
+    return bibfile if isinstance(bibfile, BibFile) else None
+
+
+def _has_parse_mode(bibfile: BibFile, lazy: bool) -> bool:
+    """Check whether the entries of *bibfile* are parsed lazily
+    if *lazy* is ``True``, or were all parsed otherwise.
+    """
+    # missing bib files have no entries to parse,
+    # and entries of databases are always looked up when needed
+    entries = bibfile.data.entries
+    return (
+        not bibfile.digest
+        or isinstance(entries, _DatabaseEntries)
+        or isinstance(entries, _LazyEntries) == lazy
+    )
+
+
+def _is_bibfile_modified(mtime: float, digest: str, bibfilename: str) -> bool:
+    """Check whether the contents of *bibfilename* differ from when
+    it had modification time *mtime* and hash *digest*.
+    The file contents are only hashed if the modification time differs.
+    """
+    return mtime != get_mtime(bibfilename) and digest != get_digest(bibfilename)
+
+
+def _uses_changed_macros(bibfile: BibFile, macros: Dict[str, str]) -> bool:
+    return any(
+        macros.get(name) != value for name, value in bibfile.used_macros.items()
+    )
+
+
+def _is_bibfile_outdated(
+    bibfile: BibFile, bibfilename: str, macros: Dict[str, str]
+) -> bool:
+    return _is_bibfile_modified(
+        bibfile.mtime, bibfile.digest, bibfilename
+    ) or _uses_changed_macros(bibfile, macros)
+
+
+def _load_bibfile(
+    bibfilename: str,
+    encoding: str,
+    macros: Dict[str, str],
+    cache: Optional[BibCache],
+    lazy: bool,
+    parsed: Optional[Tuple[BibFile, List[Tuple[str, str]]]],
+) -> BibFile:
+    """Like :func:`parse_bibfile`, but first look for the parsed data
+    in the compiled file for *bibfilename*, in *cache*,
+    and in the result *parsed* of a parallel parse,
+    and store the parsed data in *cache* if it was not found there.
+    """
+    digest = get_digest(bibfilename) if cache is not None or not lazy else ""
+    if not lazy and digest:
+        bibfile = load_compiled_bibfile(bibfilename, encoding, digest)
+        if bibfile is not None and not _uses_changed_macros(bibfile, macros):
+            logger.info(
+                "loaded {0} entries from compiled bibtex file for {1}".format(
+                    len(bibfile.data.entries), bibfilename
+                )
+            )
+            return _bind_bibfile(
+                bibfilename, bibfile._replace(mtime=get_mtime(bibfilename))
+            )
+    if cache is not None and digest:
+        bibfile = cache.load(digest, encoding, lazy)
+        if (
+            bibfile is not None
+            and _has_parse_mode(bibfile, lazy)
+            and not _uses_changed_macros(bibfile, macros)
+        ):
+            logger.info(
+                "loaded {0} entries from bibtex cache for {1}".format(
+                    len(bibfile.data.entries), bibfilename
+                )
+            )
+            return _bind_bibfile(
+                bibfilename,
+                bibfile._replace(mtime=get_mtime(bibfilename), digest=digest),
+            )
+    if parsed is not None and not _uses_changed_macros(parsed[0], macros):
+        # parsed in a worker process
+        bibfile = _bind_bibfile(bibfilename, _report_bibfile(bibfilename, *parsed))
+    else:
+        bibfile = parse_bibfile(bibfilename, encoding, macros, lazy)
+    if cache is not None and digest:
+        cache.store(digest, encoding, bibfile._replace(digest=digest), lazy)
+    return bibfile
+
+
+def _bind_bibfile(bibfilename: str, bibfile: BibFile) -> BibFile:
+    """Let the entries of *bibfile* be read from *bibfilename*,
+    if they are only read when they are looked up.
+    """
+    entries = bibfile.data.entries
+    if isinstance(entries, _UnboundEntries):
+        entries.bibfilename = bibfilename
+    return bibfile
+
+
+def _merge_bibfile(
+    data: BibliographyData, bibfilename: str, bibfile: BibFile
+) -> BibFile:
+    """Add entries from *bibfile* to *data*, checking for duplicate keys,
+    and return *bibfile* with the keys that were added.
+    Entries are not looked up, so lazily parsed entries remain unparsed.
+    """
+    entries = cast(_MergedEntries, data.entries)
+    keys: Dict[str, None] = {}
+    for key in bibfile.data.entries:
+        if key in entries:
             logger.warning(
-                "could not open bibtex file {0}.".format(filename),
+                "bibliography data error in {0}: "
+                "repeated bibliography entry: {1}".format(bibfilename, key),
                 type="bibtex",
-                subtype="bibfile_error",
+                subtype="bibfile_data_error",
             )
-            new_keys: Dict[str, None] = {}
         else:
-            try:
-                parser.parse_file(filename)
-            except BibliographyDataError as exc:
-                logger.warning(
-                    "bibliography data error in {0}: {1}".format(filename, exc),
-                    type="bibtex",
-                    subtype="bibfile_data_error",
-                )
-            keys, old_keys = dict.fromkeys(parser.data.entries.keys()), keys
-            assert all(key in keys for key in old_keys)
-            new_keys = dict.fromkeys(key for key in keys if key not in old_keys)
-            logger.info("parsed {0} entries".format(len(new_keys)))
-        bibfiles[filename] = BibFile(mtime=get_mtime(filename), keys=new_keys)
-    return BibData(encoding=encoding, bibfiles=bibfiles, data=parser.data)
+            entries.add(key, bibfile.data.entries, bibfile.crossrefs.get(key))
+            keys[key] = None
+    data.add_to_preamble(*bibfile.data.preamble_list)
+    return bibfile._replace(keys=keys)
+
+
+def parse_bibdata(
+    bibfilenames: List[str],
+    encoding: str,
+    bibdata: Optional[BibData] = None,
+    cache: Optional[BibCache] = None,
+    jobs: int = 1,
+    lazy: bool = False,
+) -> BibData:
+    """Parse *bibfilenames* with given *encoding*, and return parsed data.
+    Bib files from *bibdata* which are still up to date are not parsed again.
+    If a *cache* is specified, then parsed bib files are loaded from,
+    and stored in, this cache.
+    If *jobs* is larger than one, then bib files are parsed in
+    that many worker processes.
+    If *lazy* is ``True``, then entries are only parsed when they are
+    first looked up.
+    """
+    old_bibfiles = (
+        bibdata.bibfiles if bibdata is not None and bibdata.encoding == encoding else {}
+    )
+    macros = CaseInsensitiveDict(month_names)
+    parsed = (
+        _parse_bibfiles_speculative(
+            bibfilenames, encoding, old_bibfiles, cache, lazy, jobs
+        )
+        if jobs > 1
+        else {}
+    )
+    bibfiles: Dict[str, BibFile] = {}
+    data = BibliographyData()
+    data.entries = _MergedEntries()
+    for filename in bibfilenames:
+        bibfile = old_bibfiles.get(filename)
+        file_lazy = _is_lazy(filename, lazy)
+        if (
+            bibfile is None
+            or not _has_parse_mode(bibfile, file_lazy)
+            or _is_bibfile_outdated(bibfile, filename, macros)
+        ):
+            bibfile = _load_bibfile(
+                filename, encoding, macros, cache, file_lazy, parsed.get(filename)
+            )
+        else:
+            bibfile = bibfile._replace(mtime=get_mtime(filename))
+        macros.update(bibfile.macros)
+        bibfiles[filename] = _merge_bibfile(data, filename, bibfile)
+    if cache is not None:
+        cache.evict()
+    return BibData(encoding=encoding, bibfiles=bibfiles, data=data)
+
+
+def get_bibdata_ref(
+    bibdata: BibData, lazy: bool, duplicates: bool = False
+) -> BibDataRef:
+    """Return reference to *bibdata*, parsed lazily if *lazy* is ``True``,
+    and checked for duplicate entries if *duplicates* is ``True``.
+    """
+    bibfiles = {
+        filename: (bibfile.mtime, bibfile.digest)
+        for filename, bibfile in bibdata.bibfiles.items()
+    }
+    # modification times are left out, as they do not affect the data
+    key = repr(
+        (
+            bibdata.encoding,
+            lazy,
+            duplicates,
+            _FORMAT_VERSION,
+            [(f, d) for f, (_, d) in bibfiles.items()],
+        )
+    )
+    token = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+    return BibDataRef(
+        token=token,
+        encoding=bibdata.encoding,
+        lazy=lazy,
+        bibfiles=bibfiles,
+        duplicates=duplicates,
+    )
+
+
+def _get_entry_fingerprints(bibdata: BibData) -> Dict[str, Tuple[str, str]]:
+    """Return map from lower case key of each entry of *bibdata* to
+    its key and fingerprint, taking into account the fingerprint
+    of its crossref parent, whose fields and persons it inherits.
+    """
+    fingerprints: Dict[str, Tuple[str, str]] = {}
+    crossrefs: Dict[str, str] = {}
+    for bibfile in bibdata.bibfiles.values():
+        for key in bibfile.keys:
+            fingerprints[key.lower()] = (key, bibfile.fingerprints[key.lower()])
+            if key in bibfile.crossrefs:
+                crossrefs[key.lower()] = bibfile.crossrefs[key].lower()
+    for key_lower, parent_key_lower in crossrefs.items():
+        if parent_key_lower in fingerprints:
+            key, fingerprint = fingerprints[key_lower]
+            fingerprints[key_lower] = (
+                key,
+                _get_fingerprint(fingerprint, fingerprints[parent_key_lower][1]),
+            )
+    return fingerprints
+
+
+def get_entry_changes(old_bibdata: Optional[BibData], bibdata: BibData) -> EntryChanges:
+    """Return the keys of the entries which were added, modified, or removed
+    in *bibdata* compared to *old_bibdata*.
+    If there is no *old_bibdata*, then all entries are added.
+    """
+    old = _get_entry_fingerprints(old_bibdata) if old_bibdata is not None else {}
+    new = _get_entry_fingerprints(bibdata)
+    return EntryChanges(
+        added={key for key_lower, (key, _) in new.items() if key_lower not in old},
+        modified={
+            key
+            for key_lower, (key, fingerprint) in new.items()
+            if key_lower in old and old[key_lower][1] != fingerprint
+        },
+        removed={key for key_lower, (key, _) in old.items() if key_lower not in new},
+    )
+
+
+def load_bibdata(filename: str, bibdata_ref: BibDataRef) -> Optional[BibData]:
+    """Load the bibliography data referred to by *bibdata_ref*
+    from *filename*, or return ``None`` if the file is missing,
+    or if it contains other data.
+    """
+    try:
+        with open(filename, "rb") as stream:
+            # token goes first, so it can be checked without loading the data
+            if pickle.load(stream) != bibdata_ref.token:
+                return None
+            bibdata = pickle.load(stream)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:  # corrupt or incompatible file
+        logger.warning(
+            "could not load bibtex data file {0}: {1}".format(filename, exc),
+            type="bibtex",
+            subtype="cache_error",
+        )
+        return None
+    if not isinstance(bibdata, BibData):
+        return None
+    # the reference has the most recent modification times
+    bibfiles = {
+        bibfilename: _bind_bibfile(
+            bibfilename,
+            bibfile._replace(mtime=bibdata_ref.bibfiles[bibfilename][0]),
+        )
+        for bibfilename, bibfile in bibdata.bibfiles.items()
+    }
+    return bibdata._replace(bibfiles=bibfiles)
+
+
+def save_bibdata(filename: str, bibdata_ref: BibDataRef, bibdata: BibData) -> None:
+    """Store *bibdata*, along with the token of its reference *bibdata_ref*,
+    in *filename*.
+    """
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        _dump_pickle(filename, bibdata_ref.token, bibdata)
+    except OSError as exc:
+        logger.warning(
+            "could not store bibtex data file {0}: {1}".format(filename, exc),
+            type="bibtex",
+            subtype="cache_error",
+        )
 
 
 def is_bibdata_outdated(
-    bibdata: BibData, bibfilenames: List[str], encoding: str
+    bibdata_ref: BibDataRef,
+    bibfilenames: List[str],
+    encoding: str,
+    lazy: bool = False,
+    duplicates: bool = False,
 ) -> bool:
     return (
-        bibdata.encoding != encoding
-        or list(bibdata.bibfiles) != bibfilenames
+        bibdata_ref.encoding != encoding
+        or bibdata_ref.lazy != lazy
+        or bibdata_ref.duplicates != duplicates
+        or list(bibdata_ref.bibfiles) != bibfilenames
         or any(
-            bibfile.mtime != get_mtime(filename)
-            for filename, bibfile in bibdata.bibfiles.items()
+            _is_bibfile_modified(mtime, digest, filename)
+            for filename, (mtime, digest) in bibdata_ref.bibfiles.items()
         )
     )
 
 
 def process_bibdata(
-    bibdata: BibData, bibfilenames: List[str], encoding: str
-) -> BibData:
-    """Parse *bibfilenames* and store parsed data in *bibdata*."""
+    bibdata_ref: BibDataRef,
+    filename: str,
+    bibfilenames: List[str],
+    encoding: str,
+    cache: Optional[BibCache] = None,
+    jobs: int = 1,
+    lazy: bool = False,
+    duplicates: bool = False,
+) -> Tuple[BibDataRef, Optional[BibData], EntryChanges]:
+    """Parse *bibfilenames* if the data referred to by *bibdata_ref* is
+    out of date, store the parsed data in *filename*,
+    and return the new reference along with the parsed data,
+    and the keys of the entries which changed.
+    If the data is still up to date, it is not loaded,
+    ``None`` is returned instead of the data, and no entries changed.
+    If *duplicates* is ``True``, then duplicate and nearly identical
+    entries are reported when the data is parsed,
+    and stored along with the data.
+    Entries which are parsed lazily are not checked.
+    """
     logger.info("checking bibtex cache... ", nonl=True)
-    if is_bibdata_outdated(bibdata, bibfilenames, encoding):
+    if is_bibdata_outdated(bibdata_ref, bibfilenames, encoding, lazy, duplicates):
         logger.info("out of date")
-        return parse_bibdata(bibfilenames, encoding)
+        old_bibdata = load_bibdata(filename, bibdata_ref)
+        bibdata = parse_bibdata(
+            bibfilenames, encoding, old_bibdata, cache, jobs, lazy
+        )
+        if duplicates:
+            bibdata = bibdata._replace(
+                duplicates=tuple(_report_duplicates(_get_parsed_entries(bibdata)))
+            )
+        bibdata_ref = get_bibdata_ref(bibdata, lazy, duplicates)
+        save_bibdata(filename, bibdata_ref, bibdata)
+        return bibdata_ref, bibdata, get_entry_changes(old_bibdata, bibdata)
     else:
         logger.info("up to date")
-        return bibdata
+        # record new modification times of files whose contents did not change
+        bibfiles = {
+            bibfilename: (get_mtime(bibfilename), digest)
+            for bibfilename, (_, digest) in bibdata_ref.bibfiles.items()
+        }
+        changes = EntryChanges(added=set(), modified=set(), removed=set())
+        return bibdata_ref._replace(bibfiles=bibfiles), None, changes
+
+
+def _get_parsed_entries(bibdata: BibData) -> Dict[str, Entry]:
+    """Return the entries of *bibdata* which are already parsed,
+    leaving out entries which are only parsed when they are looked up.
+    """
+    return {
+        key: bibdata.data.entries[key]
+        for bibfile in bibdata.bibfiles.values()
+        if not isinstance(bibfile.data.entries, _UnboundEntries)
+        for key in bibfile.keys
+    }
+
+
+def _report_duplicates(entries: Mapping[str, Entry]) -> List[Tuple[str, ...]]:
+    groups = find_duplicates(entries)
+    for keys in groups:
+        logger.warning(
+            "possible duplicate entries: {0}".format(", ".join(keys)),
+            type="bibtex",
+            subtype="duplicate_entry",
+        )
+    return groups
+
+
+_BibDataResult = Tuple[
+    List[logging.LogRecord], BibDataRef, Optional[BibData], EntryChanges
+]
+
+
+def _process_bibdata_logged(*args) -> _BibDataResult:
+    """Call :func:`process_bibdata` in a worker process,
+    collecting its log records so they can be handled by the main process.
+    """
+    logging.getLogger(NAMESPACE).setLevel(logging.DEBUG)
+    collector = LogCollector()
+    with collector.collect():
+        bibdata_ref, _, changes = process_bibdata(*args)
+    # parsed data is stored on disk, so no need to send it back
+    return collector.logs, bibdata_ref, None, changes
+
+
+def _process_bibdata_unlogged(*args) -> _BibDataResult:
+    return ([], *process_bibdata(*args))
+
+
+class BibDataProcess:
+    """Call :func:`process_bibdata` in the background,
+    if the data referred to by *bibdata_ref* is out of date.
+    Bib files are parsed in a worker process,
+    or in a thread if *jobs* is larger than one,
+    as they are then parsed in worker processes already.
+    """
+
+    def __init__(
+        self,
+        bibdata_ref: BibDataRef,
+        filename: str,
+        bibfilenames: List[str],
+        encoding: str,
+        cache: Optional[BibCache] = None,
+        jobs: int = 1,
+        lazy: bool = False,
+        duplicates: bool = False,
+    ):
+        self._args = (
+            bibdata_ref,
+            filename,
+            bibfilenames,
+            encoding,
+            cache,
+            jobs,
+            lazy,
+            duplicates,
+        )
+        self._executor: Optional[Executor] = None
+        self._future: Optional["Future[_BibDataResult]"] = None
+        if is_bibdata_outdated(bibdata_ref, bibfilenames, encoding, lazy, duplicates):
+            if jobs > 1:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+                self._future = self._executor.submit(
+                    _process_bibdata_unlogged, *self._args
+                )
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=1)
+                self._future = self._executor.submit(
+                    _process_bibdata_logged, *self._args
+                )
+
+    def result(self) -> Tuple[BibDataRef, Optional[BibData], EntryChanges]:
+        """Wait until the bib files are processed,
+        log any messages from processing them,
+        and return the result of :func:`process_bibdata`.
+        """
+        if self._future is None:
+            return process_bibdata(*self._args)
+        assert self._executor is not None
+        try:
+            logs, bibdata_ref, bibdata, changes = self._future.result()
+        except BrokenProcessPool:
+            logs, (bibdata_ref, bibdata, changes) = [], process_bibdata(*self._args)
+        finally:
+            self._executor.shutdown()
+        for record in logs:
+            logger.handle(record)
+        if bibdata is not None:  # processed in a worker process
+            for bibfilename, bibfile in bibdata.bibfiles.items():
+                _bind_bibfile(bibfilename, bibfile)
+        return bibdata_ref, bibdata, changes
 
 
 # function does not really fit in any module, but used by both
@@ -11,14 +11,14 @@
 """
 
 import ast  # parse(), used for filter
-from typing import TYPE_CHECKING, Dict, List, NamedTuple, cast
+from typing import TYPE_CHECKING, List, NamedTuple, cast
 
-import docutils.nodes
 import docutils.parsers.rst.directives as directives
 import sphinx.util
 from docutils.parsers.rst import Directive
 
-from .bibfile import _make_ids, normpath_filename
+from .bibfile import _make_ids, expand_filename, normpath_filename
+from .domain import _compile_filter
 from .nodes import bibliography as bibliography_node
 
 if TYPE_CHECKING:
@@ -49,7 +49,8 @@ class BibliographyValue(NamedTuple):
     labelprefix: str  #: String prefix for pybtex generated labels.
     keyprefix: str  #: String prefix for citation keys.
     filter_: ast.AST  #: Parsed filter expression.
-    citation_nodes: Dict[str, docutils.nodes.Element]  #: key -> citation node
+    #: Number of the directive in its document, for citation ids.
+    bibliography_count: int
     keys: List[str]  #: Keys listed as content of the directive.
 
 
@@ -58,10 +59,10 @@ class BibliographyDirective(Directive):
     """Class for processing the :rst:dir:`bibliography` directive.
 
     Produces a
-    :class:`~sphinxcontrib.bibtex.nodes.bibliography` node,
-    along with (empty) citation nodes that will be formatted later in the
+    :class:`~sphinxcontrib.bibtex.nodes.bibliography` node.
+    Its citations are determined, formatted, and given an id later in the
     *env-updated* stage, and inserted into the document in a post-transform.
-    We cannot insert the citation nodes here because we do not yet know
+    We cannot create the citation nodes here because we do not yet know
     which keys have been cited.
 
     .. seealso::
@@ -117,7 +118,9 @@ class BibliographyDirective(Directive):
                     subtype="filter_overrides",
                 )
             try:
-                return ast.parse(self.options["filter"])
+                filter_ = ast.parse(self.options["filter"])
+                # validate the expression, so errors are reported only once
+                _compile_filter(filter_)
             except SyntaxError:
                 logger.warning(
                     "syntax error in :filter: expression"
@@ -130,6 +133,16 @@ class BibliographyDirective(Directive):
                     subtype="filter_syntax_error",
                 )
                 return ast.parse("cited")
+            except ValueError as err:
+                logger.warning(
+                    "syntax error in :filter: expression; %s; "
+                    "the option will be ignored" % err,
+                    location=(env.docname, self.lineno),
+                    type="bibtex",
+                    subtype="filter_syntax_error",
+                )
+                return ast.parse("cited")
+            return filter_
         elif "all" in self.options:
             return ast.parse("True")
         elif "notcited" in self.options:
@@ -149,8 +162,12 @@ class BibliographyDirective(Directive):
         if self.arguments:
             bibfiles = []
             for bibfile in self.arguments[0].split():
-                normbibfile = normpath_filename(env, bibfile)
-                if normbibfile not in domain.bibdata.bibfiles:
+                normbibfiles = [
+                    normbibfile
+                    for normbibfile in expand_filename(normpath_filename(env, bibfile))
+                    if normbibfile in domain.bibdata.bibfiles
+                ]
+                if not normbibfiles:
                     logger.warning(
                         "{0} not found or not configured"
                         " in bibtex_bibfiles".format(bibfile),
@@ -159,12 +176,11 @@ class BibliographyDirective(Directive):
                         subtype="bibfile_error",
                     )
                 else:
-                    bibfiles.append(normbibfile)
+                    bibfiles.extend(normbibfiles)
         else:
             bibfiles = list(domain.bibdata.bibfiles.keys())
-        for bibfile in bibfiles:
-            env.note_dependency(bibfile)
-        # generate nodes and ids
+        domain.note_bibfiles(env.docname, bibfiles)
+        # generate node and id
         keyprefix: str = self.options.get("keyprefix", "")
         list_: str = self.options.get("list", "citation")
         if list_ not in {"bullet", "enumerated", "citation"}:
@@ -175,10 +191,6 @@ class BibliographyDirective(Directive):
                 subtype="list_type_error",
             )
             list_ = "citation"
-        if list_ in {"bullet", "enumerated"}:
-            citation_node_class = docutils.nodes.list_item
-        else:
-            citation_node_class = docutils.nodes.citation
         bibliography_count = env.temp_data["bibtex_bibliography_count"] = (
             env.temp_data.get("bibtex_bibliography_count", 0) + 1
         )
@@ -196,29 +208,14 @@ class BibliographyDirective(Directive):
             ),
         )
         self.state.document.note_explicit_target(node, node)
-        # we only know which citations to included at resolve stage
-        # but we need to know their ids before resolve stage
-        # so for now we generate a node, and thus, an id, for every entry
-        citation_nodes: Dict[str, docutils.nodes.Element] = {
-            keyprefix
-            + entry.key: citation_node_class(
-                ids=_make_ids(
-                    docname=env.docname,
-                    lineno=self.lineno,
-                    ids=ids,
-                    raw_id=env.app.config.bibtex_cite_id.format(
-                        bibliography_count=bibliography_count, key=keyprefix + entry.key
-                    ),
-                )
-            )
-            for entry in domain.get_entries(bibfiles)
-        }
-        for citation_node in citation_nodes.values():
-            self.state.document.note_explicit_target(citation_node, citation_node)
+        # we only know which citations to include once all documents are read,
+        # so citation nodes and their ids are only created for those,
+        # in the env-updated stage
         # check and get keys
+        bibfile_keys = [domain.bibdata.bibfiles[bibfile].keys for bibfile in bibfiles]
         keys = []
         for key in self.content:
-            if keyprefix + key not in citation_nodes:
+            if not any(key in keys2 for keys2 in bibfile_keys):
                 logger.warning(
                     'could not find bibtex key "%s"' % key,
                     location=(env.docname, self.lineno),
@@ -238,7 +235,7 @@ class BibliographyDirective(Directive):
             labelprefix=self.options.get("labelprefix", ""),
             keyprefix=keyprefix,
             bibfiles=bibfiles,
-            citation_nodes=citation_nodes,
+            bibliography_count=bibliography_count,
             keys=keys,
         )
         bib_key = BibliographyKey(docname=env.docname, id_=node["ids"][0])
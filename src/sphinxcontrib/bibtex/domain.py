@@ -10,13 +10,18 @@
 """
 
 import ast
+import operator
+import os.path
 import re
 from typing import (
     TYPE_CHECKING,
+    Any,
+    Callable,
     Dict,
     Iterable,
     List,
     NamedTuple,
+    NoReturn,
     Optional,
     Set,
     Tuple,
@@ -39,8 +44,23 @@ from sphinx.locale import _
 
 import sphinxcontrib.bibtex.plugin
 
-from .bibfile import BibData, normpath_filename, process_bibdata
+from .bibfile import (
+    BibCache,
+    BibData,
+    BibDataProcess,
+    BibDataRef,
+    EntryChanges,
+    _get_fingerprint,
+    _is_bibfile_modified,
+    _make_ids,
+    expand_filename,
+    load_bibdata,
+    normpath_filename,
+    process_bibdata,
+)
 from .citation_target import CitationTarget, parse_citation_targets
+from .query import EntryIndex, _get_persons, plan_filter
+from .richtext import format_entry
 from .roles import CiteRole
 from .style.referencing import BaseReferenceStyle, format_references
 from .style.template import SphinxReferenceInfo
@@ -59,142 +79,228 @@ if TYPE_CHECKING:
 logger = sphinx.util.logging.getLogger(__name__)
 
 
-def _raise_invalid_node(node):
+def _raise_invalid_node(node) -> NoReturn:
     """Helper method to raise an exception when an invalid node is
-    visited.
+    compiled.
     """
     raise ValueError("invalid node %s in filter expression" % node)
 
 
-class _FilterVisitor(ast.NodeVisitor):
-
-    """Visit the abstract syntax tree of a parsed filter expression."""
+class _FilterContext:
+    """The entry to which a compiled filter expression is applied."""
 
-    entry = None
-    """The bibliographic entry to which the filter must be applied."""
+    __slots__ = ("entries", "key", "docname", "cited_docnames", "_entry")
 
-    cited_docnames = False
-    """The documents where the entry is cited (empty if not cited)."""
-
-    def __init__(self, entry, docname, cited_docnames):
-        self.entry = entry
+    def __init__(self, entries, docname):
+        self.entries = entries
         self.docname = docname
+        #: The key of the bibliographic entry to which the filter is applied.
+        self.key = ""
+        #: The documents where the entry is cited (empty if not cited).
+        self.cited_docnames: Set[str] = set()
+        self._entry = None
+
+    def set_key(self, key: str, cited_docnames: Set[str]) -> None:
+        self.key = key
         self.cited_docnames = cited_docnames
+        self._entry = None
+
+    @property
+    def entry(self):
+        """The bibliographic entry to which the filter is applied.
+        It is only looked up when the filter needs it,
+        so lazily parsed entries are not parsed for filters on keys
+        or citations only.
+        """
+        if self._entry is None:
+            self._entry = self.entries[self.key]
+        return self._entry
+
+
+_Predicate = Callable[[_FilterContext], Any]
+
+_COMPARE_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+}
+
+
+class _Constant:
+    """Function returning a constant, along with the constant itself."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __call__(self, context: _FilterContext) -> Any:
+        return self.value
+
 
-    def visit_Module(self, node):
+def _regex_search(node: ast.BinOp, left: _Predicate, right: _Predicate) -> _Predicate:
+    """Return function to match the left operand against the right operand,
+    which is compiled only once if it is constant.
+    """
+    if isinstance(right, _Constant):
+        try:
+            regex = re.compile(right.value, re.IGNORECASE)
+        except re.error as err:
+            raise ValueError("invalid regular expression %r: %s" % (right.value, err))
+
+        def search(context: _FilterContext) -> Any:
+            value = left(context)
+            if not isinstance(value, str):
+                raise ValueError("expected a string on left side of %s" % node.op)
+            return regex.search(value)
+
+        return search
+
+    def search2(context: _FilterContext) -> Any:
+        value, pattern = left(context), right(context)
+        if not isinstance(value, str):
+            raise ValueError("expected a string on left side of %s" % node.op)
+        if not isinstance(pattern, str):
+            raise ValueError("expected a string on right side of %s" % node.op)
+        return re.search(pattern, value, re.IGNORECASE)
+
+    return search2
+
+
+class _FilterCompiler(ast.NodeVisitor):
+    """Compile the abstract syntax tree of a parsed filter expression
+    into a function which evaluates the expression
+    for the entry of a :class:`_FilterContext`.
+    The whole tree is validated when it is compiled,
+    so :exc:`ValueError` is raised for any invalid expression,
+    even for parts that might never be evaluated.
+    """
+
+    def visit_Module(self, node) -> _Predicate:
         if len(node.body) != 1:
             raise ValueError("filter expression cannot contain multiple expressions")
         return self.visit(node.body[0])
 
-    def visit_Expr(self, node):
+    def visit_Expr(self, node) -> _Predicate:
         return self.visit(node.value)
 
-    def visit_BoolOp(self, node):
-        outcomes = (self.visit(value) for value in node.values)
+    def visit_BoolOp(self, node) -> _Predicate:
+        values = [self.visit(value) for value in node.values]
         if isinstance(node.op, ast.And):
-            return all(outcomes)
+
+            def all_(context: _FilterContext) -> bool:
+                for value in values:
+                    if not value(context):
+                        return False
+                return True
+
+            return all_
         elif isinstance(node.op, ast.Or):
-            return any(outcomes)
+
+            def any_(context: _FilterContext) -> bool:
+                for value in values:
+                    if value(context):
+                        return True
+                return False
+
+            return any_
         else:  # pragma: no cover
             # there are no other boolean operators
             # so this code should never execute
             assert False, "unexpected boolean operator %s" % node.op
 
-    def visit_UnaryOp(self, node):
+    def visit_UnaryOp(self, node) -> _Predicate:
         if isinstance(node.op, ast.Not):
-            return not self.visit(node.operand)
+            operand = self.visit(node.operand)
+            return lambda context: not operand(context)
         else:
             _raise_invalid_node(node)
 
-    def visit_BinOp(self, node):
+    def visit_BinOp(self, node) -> _Predicate:
         left = self.visit(node.left)
         op = node.op
         right = self.visit(node.right)
         if isinstance(op, ast.Mod):
             # modulo operator is used for regular expression matching
-            if not isinstance(left, str):
+            if isinstance(left, _Constant) and not isinstance(left.value, str):
                 raise ValueError("expected a string on left side of %s" % node.op)
-            if not isinstance(right, str):
+            if isinstance(right, _Constant) and not isinstance(right.value, str):
                 raise ValueError("expected a string on right side of %s" % node.op)
-            return re.search(right, left, re.IGNORECASE)
+            return _regex_search(node, left, right)
         elif isinstance(op, ast.BitOr):
-            return left | right
+            return lambda context: left(context) | right(context)
         elif isinstance(op, ast.BitAnd):
-            return left & right
+            return lambda context: left(context) & right(context)
         else:
             _raise_invalid_node(node)
 
-    def visit_Compare(self, node):
+    def visit_Compare(self, node) -> _Predicate:
         # keep it simple: binary comparators only
         if len(node.ops) != 1:
             raise ValueError("syntax for multiple comparators not supported")
         left = self.visit(node.left)
-        op = node.ops[0]
+        op = _COMPARE_OPERATORS.get(type(node.ops[0]))
         right = self.visit(node.comparators[0])
-        if isinstance(op, ast.Eq):
-            return left == right
-        elif isinstance(op, ast.NotEq):
-            return left != right
-        elif isinstance(op, ast.Lt):
-            return left < right
-        elif isinstance(op, ast.LtE):
-            return left <= right
-        elif isinstance(op, ast.Gt):
-            return left > right
-        elif isinstance(op, ast.GtE):
-            return left >= right
-        elif isinstance(op, ast.In):
-            return left in right
-        elif isinstance(op, ast.NotIn):
-            return left not in right
-        else:
+        if op is None:
             # not used currently: ast.Is | ast.IsNot
-            _raise_invalid_node(op)
+            _raise_invalid_node(node.ops[0])
+        return lambda context: op(left(context), right(context))
 
-    def visit_Name(self, node):
-        """Calculate the value of the given identifier."""
+    def visit_Name(self, node) -> _Predicate:
+        """Compile the given identifier into a function returning its value."""
         id_ = node.id
         if id_ == "type":
-            return self.entry.type.lower()
+            return lambda context: context.entry.type.lower()
         elif id_ == "key":
-            return self.entry.key.lower()
+            return lambda context: context.key.lower()
         elif id_ == "cited":
-            return bool(self.cited_docnames)
+            return lambda context: bool(context.cited_docnames)
         elif id_ == "docname":
-            return self.docname
+            return lambda context: context.docname
         elif id_ == "docnames":
-            return self.cited_docnames
+            return lambda context: context.cited_docnames
         elif id_ == "author" or id_ == "editor":
-            if id_ in self.entry.persons:
-                return " and ".join(
-                    str(person)  # XXX needs fix in pybtex?
-                    for person in self.entry.persons[id_]
-                )
-            else:
-                return ""
+            return lambda context: _get_persons(context.entry, id_)
         else:
-            return self.entry.fields.get(id_, "")
+            return lambda context: context.entry.fields.get(id_, "")
 
-    def visit_Set(self, node):
-        return frozenset(self.visit(elt) for elt in node.elts)
+    def visit_Set(self, node) -> _Predicate:
+        elts = [self.visit(elt) for elt in node.elts]
+        if all(isinstance(elt, _Constant) for elt in elts):
+            return _Constant(frozenset(elt.value for elt in elts))
+        return lambda context: frozenset(elt(context) for elt in elts)
 
     # NameConstant is Python 3.4 only
-    def visit_NameConstant(self, node):
-        return node.value  # pragma: no cover
+    def visit_NameConstant(self, node) -> _Predicate:
+        return _Constant(node.value)  # pragma: no cover
 
     # Constant is Python 3.6+ only
     # Since 3.8 Num, Str, Bytes, NameConstant and Ellipsis are just Constant
-    def visit_Constant(self, node):
-        return node.value
+    def visit_Constant(self, node) -> _Predicate:
+        return _Constant(node.value)
 
     # Not used on 3.8+
-    def visit_Str(self, node):
-        return node.s  # pragma: no cover
+    def visit_Str(self, node) -> _Predicate:
+        return _Constant(node.s)  # pragma: no cover
 
-    def generic_visit(self, node):
+    def generic_visit(self, node) -> NoReturn:
         _raise_invalid_node(node)
 
 
+#: Filter expression used instead of invalid filter expressions.
+_CITED_FILTER = ast.parse("cited")
+
+
+def _compile_filter(filter_: ast.AST) -> _Predicate:
+    """Compile the parsed filter expression *filter_* into a function."""
+    return _FilterCompiler().visit(filter_)
+
+
 def get_docnames(env):
     """Get document names in order."""
     rel = env.collect_relations()
@@ -222,6 +328,37 @@ class Citation(NamedTuple):
     tooltip_entry: Optional["FormattedEntry"]  #: Formatted entry for tooltip.
 
 
+def env_before_read_docs(
+    app: "Sphinx", env: "BuildEnvironment", docnames: List[str]
+) -> None:
+    domain = cast(BibtexDomain, env.get_domain("cite"))
+    # worker processes that read documents in parallel cannot wait for
+    # bib files that are parsed in the background, so wait before they start
+    if app.parallel > 1:
+        domain.wait_bibdata()
+    domain.env_before_read_docs()
+
+
+def doctree_read(app: "Sphinx", doctree: docutils.nodes.document) -> None:
+    # citation ids are only made once all documents are read,
+    # so remember which ids are taken in documents with bibliographies
+    env = app.env
+    if env.temp_data.get("bibtex_bibliography_count"):
+        domain = cast(BibtexDomain, env.get_domain("cite"))
+        domain.document_ids[env.docname] = set(doctree.ids)
+
+
+def env_get_outdated(
+    app: "Sphinx",
+    env: "BuildEnvironment",
+    added: Set[str],
+    changed: Set[str],
+    removed: Set[str],
+) -> List[str]:
+    domain = cast(BibtexDomain, env.get_domain("cite"))
+    return domain.get_outdated_docnames(removed)
+
+
 def env_updated(app: "Sphinx", env: "BuildEnvironment") -> Iterable[str]:
     domain = cast(BibtexDomain, env.get_domain("cite"))
     return domain.env_updated()
@@ -243,23 +380,50 @@ class BibtexDomain(Domain):
 
     name = "cite"
     label = "BibTeX Citations"
-    data_version = 4
+    data_version = 5
     initial_data = dict(
-        bibdata=BibData(
-            encoding="", bibfiles={}, data=pybtex.database.BibliographyData()
-        ),
+        bibdata=BibDataRef(token="", encoding="", lazy=False, bibfiles={}),
         bibliography_header=docutils.nodes.container(),
         bibliographies={},
         citations=[],
         citation_refs=[],
+        cited_docnames={},
+        document_bibfiles={},
+        document_ids={},
+        filtered_keys={},
     )
     backend = pybtex_docutils.Backend()
     reference_style: BaseReferenceStyle
+    _bibdata: Optional[BibData] = None
+    _bibdata_process: Optional[BibDataProcess] = None
+    #: Changes not yet reported, as the environment was not yet ready.
+    _entry_changes: Optional[EntryChanges] = None
+    _env_ready: bool = False
+
+    @property
+    def bibdata_filename(self) -> str:
+        """File where the parsed bibliography data is stored.
+        This data is kept out of the environment, which only refers to it,
+        so it is not pickled and unpickled along with the environment.
+        """
+        return os.path.join(self.env.doctreedir, "bibtex.pickle")
 
     @property
     def bibdata(self) -> BibData:
-        """Information about the bibliography files."""
-        return self.data["bibdata"]
+        """Information about the bibliography files.
+        It is loaded from :attr:`bibdata_filename` when it is first needed.
+        """
+        self.wait_bibdata()
+        if self._bibdata is None:
+            self._bibdata = load_bibdata(self.bibdata_filename, self.data["bibdata"])
+        if self._bibdata is None:  # missing, or not in sync with environment
+            # previous entries are unknown, so changes are not reported
+            self._update_bibdata(
+                BibDataRef(token="", encoding="", lazy=False, bibfiles={}),
+                report_changes=False,
+            )
+        assert self._bibdata is not None
+        return self._bibdata
 
     @property
     def bibliography_header(self) -> docutils.nodes.Element:
@@ -280,6 +444,29 @@ class BibtexDomain(Domain):
         """Citation reference data."""
         return self.data["citation_refs"]
 
+    @property
+    def cited_docnames(self) -> Dict[str, Set[str]]:
+        """Map storing the documents in which each key is cited."""
+        return self.data["cited_docnames"]
+
+    @property
+    def document_bibfiles(self) -> Dict[str, Set[str]]:
+        """Map storing the bib files used by each document."""
+        return self.data["document_bibfiles"]
+
+    @property
+    def document_ids(self) -> Dict[str, Set[str]]:
+        """Map storing the ids in each document with a bibliography."""
+        return self.data["document_ids"]
+
+    @property
+    def filtered_keys(self) -> Dict["BibliographyKey", Tuple[str, List[str]]]:
+        """Map storing the keys of the entries satisfying the filter
+        expression of each bibliography,
+        along with a hash of everything that they depend on.
+        """
+        return self.data["filtered_keys"]
+
     def __init__(self, env: "BuildEnvironment"):
         # set up referencing style
         style = sphinxcontrib.bibtex.plugin.find_plugin(
@@ -293,20 +480,29 @@ class BibtexDomain(Domain):
             citation=ObjType(_("citation"), *role_names, searchprio=-1),
         )
         self.roles = dict((name, CiteRole()) for name in role_names)
+        # formatted entries, by style, label, and key, shared by all
+        # bibliographies, tooltips, and footnotes formatted in this build
+        self.formatted_entries: Dict[Tuple[str, str, str], FormattedEntry] = {}
+        # compiled filter expressions, by their dumped syntax tree
+        self.filters: Dict[str, _Predicate] = {}
+        # indexes of the entries, to narrow down the entries to filter
+        self.entry_index = EntryIndex()
         # initialize the domain
         super().__init__(env)
-        # connect env-updated
+        # connect env-get-outdated, env-before-read-docs, doctree-read,
+        # and env-updated
+        env.app.connect("env-get-outdated", env_get_outdated)
+        env.app.connect("env-before-read-docs", env_before_read_docs)
+        env.app.connect("doctree-read", doctree_read)
         env.app.connect("env-updated", env_updated)
         # check config
         if env.app.config.bibtex_bibfiles is None:
             raise ExtensionError("You must configure the bibtex_bibfiles setting")
+        # bib files as they were when documents were last read
+        self._previous_bibdata_ref: BibDataRef = self.data["bibdata"]
         # update bib file information in the cache
-        bibfiles = [
-            normpath_filename(env, "/" + bibfile)
-            for bibfile in env.app.config.bibtex_bibfiles
-        ]
-        self.data["bibdata"] = process_bibdata(
-            self.bibdata, bibfiles, env.app.config.bibtex_encoding
+        self._update_bibdata(
+            self.data["bibdata"], background=env.app.config.bibtex_parse_background
         )
         # parse bibliography header
         header = getattr(env.app.config, "bibtex_bibliography_header")
@@ -316,18 +512,149 @@ class BibtexDomain(Domain):
                 header, "bibliography_header"
             )
 
+    def _update_bibdata(
+        self,
+        bibdata_ref: BibDataRef,
+        background: bool = False,
+        report_changes: bool = True,
+    ) -> None:
+        """Parse the bib files if the data referred to by *bibdata_ref*
+        is out of date.
+        If *background* is ``True``, they are parsed in the background,
+        until :meth:`wait_bibdata` is called.
+        If *report_changes* is ``False``, no ``bibtex-entries-changed``
+        event is emitted.
+        """
+        config = self.env.app.config
+        bibfiles: Dict[str, None] = {}
+        for bibfile in config.bibtex_bibfiles:
+            filenames = expand_filename(normpath_filename(self.env, "/" + bibfile))
+            if not filenames:
+                logger.warning(
+                    "could not open bibtex file {0}.".format(bibfile),
+                    type="bibtex",
+                    subtype="bibfile_error",
+                )
+            bibfiles.update(dict.fromkeys(filenames))
+        cache_dir = config.bibtex_cache_dir
+        cache = (
+            BibCache(
+                dirname=os.path.join(self.env.srcdir, os.path.expanduser(cache_dir)),
+                max_size=config.bibtex_cache_size,
+            )
+            if cache_dir
+            else None
+        )
+        jobs = config.bibtex_parse_jobs
+        args = (
+            bibdata_ref,
+            self.bibdata_filename,
+            list(bibfiles),
+            config.bibtex_encoding,
+            cache,
+            (os.cpu_count() or 1) if jobs == "auto" else jobs,
+            config.bibtex_lazy_parsing,
+            config.bibtex_check_duplicates,
+        )
+        if background:
+            self._bibdata_process = BibDataProcess(*args)
+        else:
+            bibdata_ref, bibdata, changes = process_bibdata(*args)
+            if not report_changes:
+                changes = EntryChanges(added=set(), modified=set(), removed=set())
+            self._set_bibdata(bibdata_ref, bibdata, changes)
+
+    def wait_bibdata(self) -> None:
+        """Wait until bib files that are parsed in the background
+        are parsed.
+        """
+        if self._bibdata_process is not None:
+            process, self._bibdata_process = self._bibdata_process, None
+            self._set_bibdata(*process.result())
+
+    def _set_bibdata(
+        self,
+        bibdata_ref: BibDataRef,
+        bibdata: Optional[BibData],
+        changes: EntryChanges,
+    ) -> None:
+        """Refer to the processed bibliography data,
+        and emit the ``bibtex-entries-changed`` event
+        if any entries changed, once the environment is ready.
+        """
+        self.data["bibdata"], self._bibdata = bibdata_ref, bibdata
+        self.entry_index = EntryIndex()
+        if changes.added or changes.modified or changes.removed:
+            self._entry_changes = changes
+        self._emit_entries_changed()
+
+    def env_before_read_docs(self) -> None:
+        """Note that the environment is ready,
+        and emit the ``bibtex-entries-changed`` event
+        for entries which changed while it was set up.
+        """
+        self._env_ready = True
+        self._emit_entries_changed()
+
+    def _emit_entries_changed(self) -> None:
+        # handlers may use the environment, and thereby this domain,
+        # so they are only called once the environment is set up
+        if self._env_ready and self._entry_changes is not None:
+            changes, self._entry_changes = self._entry_changes, None
+            self.env.app.emit(
+                "bibtex-entries-changed",
+                self.env,
+                changes.added,
+                changes.modified,
+                changes.removed,
+            )
+
+    def note_bibfiles(self, docname: str, bibfiles: Iterable[str]) -> None:
+        """Note that document *docname* uses *bibfiles*,
+        so it is read again when their contents change.
+        """
+        self.document_bibfiles.setdefault(docname, set()).update(bibfiles)
+
+    def get_outdated_docnames(self, removed: Set[str]) -> List[str]:
+        """Return the documents that use bib files whose contents changed
+        since the documents were last read, except for *removed* documents.
+        Unlike a dependency noted in the environment,
+        this ignores bib files whose modification time changed
+        but whose contents did not.
+        """
+        bibfiles = {
+            filename
+            for filename, (mtime, digest) in self._previous_bibdata_ref.bibfiles.items()
+            if _is_bibfile_modified(mtime, digest, filename)
+        }
+        return [
+            docname
+            for docname, bibfiles2 in self.document_bibfiles.items()
+            if docname not in removed and not bibfiles.isdisjoint(bibfiles2)
+        ]
+
     def clear_doc(self, docname: str) -> None:
         self.data["citations"] = [
             citation
             for citation in self.citations
             if citation.bibliography_key.docname != docname
         ]
+        for citation_ref in self.citation_refs:
+            if citation_ref.docname == docname:
+                for target in citation_ref.targets:
+                    docnames = self.cited_docnames.get(target.key)
+                    if docnames is not None:
+                        docnames.discard(docname)
+                        if not docnames:
+                            del self.cited_docnames[target.key]
         self.data["citation_refs"] = [
             ref for ref in self.citation_refs if ref.docname != docname
         ]
         for bib_key in list(self.bibliographies.keys()):
             if bib_key.docname == docname:
                 del self.bibliographies[bib_key]
+        self.document_bibfiles.pop(docname, None)
+        self.document_ids.pop(docname, None)
 
     def merge_domaindata(self, docnames: List[str], otherdata: Dict) -> None:
         for bib_key, bib_value in otherdata["bibliographies"].items():
@@ -336,6 +663,14 @@ class BibtexDomain(Domain):
         for citation_ref in otherdata["citation_refs"]:
             if citation_ref.docname in docnames:
                 self.citation_refs.append(citation_ref)
+        for key, docnames2 in otherdata["cited_docnames"].items():
+            docnames2 = docnames2.intersection(docnames)
+            if docnames2:
+                self.cited_docnames.setdefault(key, set()).update(docnames2)
+        for name in ("document_bibfiles", "document_ids"):
+            for docname, value in otherdata[name].items():
+                if docname in docnames:
+                    self.data[name][docname] = value
         # 'citations' domain data calculated in env_updated
 
     def env_updated(self) -> Iterable[str]:
@@ -346,10 +681,15 @@ class BibtexDomain(Domain):
         # the labels here because they must be known when resolve_xref is
         # called.
         self.citations.clear()  # might have been restored from pickle
+        # the environment must refer to the parsed data before it is pickled
+        self.wait_bibdata()
         docnames = list(get_docnames(self.env))
         # we keep track of this to quickly check for duplicates
         used_keys: Set[str] = set()
         used_labels: Dict[str, str] = {}
+        # ids taken in each document, and next automatic id to try
+        used_ids: Dict[str, Set[str]] = {}
+        auto_ids: Dict[str, int] = {}
         for bibliography_key, bibliography in self.bibliographies.items():
             for entry, formatted_entry, tooltip_entry in self.get_formatted_entries(
                 bibliography_key,
@@ -365,9 +705,16 @@ class BibtexDomain(Domain):
                         type="bibtex",
                         subtype="duplicate_citation",
                     )
+                docname = bibliography_key.docname
+                if docname not in used_ids:
+                    used_ids[docname] = set(self.document_ids.get(docname, ()))
+                    auto_ids[docname] = 1
+                citation_id = self._make_citation_id(
+                    bibliography_key, key, used_ids[docname], auto_ids
+                )
                 self.citations.append(
                     Citation(
-                        citation_id=bibliography.citation_nodes[key]["ids"][0],
+                        citation_id=citation_id,
                         bibliography_key=bibliography_key,
                         key=key,
                         entry=entry,
@@ -393,8 +740,53 @@ class BibtexDomain(Domain):
                             type="bibtex",
                             subtype="duplicate_label",
                         )
+        # forget the filtered keys of bibliographies which were removed
+        self.data["filtered_keys"] = {
+            bibliography_key: filtered_keys
+            for bibliography_key, filtered_keys in self.filtered_keys.items()
+            if bibliography_key in self.bibliographies
+        }
+        if self.env.app.config.bibtex_prune_entries:
+            # cited entries are kept in the citations, and all other
+            # entries are loaded again from disk if they are needed later
+            self._bibdata = None
         return []  # expects list of updated docnames
 
+    def _make_citation_id(
+        self,
+        bibliography_key: "BibliographyKey",
+        key: str,
+        ids: Set[str],
+        auto_ids: Dict[str, int],
+    ) -> str:
+        """Return an id for the citation of *key* in the bibliography
+        with *bibliography_key* which is not in *ids*, and add it to *ids*.
+        Unless ``bibtex_cite_id`` is set, the id is numbered as docutils
+        would, with *auto_ids* holding the next number to try in each document.
+        """
+        bibliography = self.bibliographies[bibliography_key]
+        docname = bibliography_key.docname
+        for id_ in _make_ids(
+            docname=docname,
+            lineno=bibliography.line,
+            ids=ids,
+            raw_id=self.env.app.config.bibtex_cite_id.format(
+                bibliography_count=bibliography.bibliography_count, key=key
+            ),
+        ):
+            return id_
+        settings = self.env.settings
+        prefix = settings.get("id_prefix", "") + settings.get("auto_id_prefix", "id")
+        if prefix.endswith("%"):
+            tagname = "citation" if bibliography.list_ == "citation" else "list-item"
+            prefix = prefix[:-1] + tagname + "-"
+        number = auto_ids[docname]
+        while prefix + str(number) in ids:
+            number += 1
+        auto_ids[docname] = number + 1
+        ids.add(prefix + str(number))
+        return prefix + str(number)
+
     def resolve_xref(
         self,
         env: "BuildEnvironment",
@@ -487,35 +879,140 @@ class BibtexDomain(Domain):
             for target in citation_ref.targets:
                 yield target.key
 
+    def get_keys(self, bibfiles: List[str]) -> Iterable[str]:
+        """Return all bibliography keys from the bib files, unsorted (i.e.
+        in order of appearance in the bib files.
+        """
+        for bibfile in bibfiles:
+            yield from self.bibdata.bibfiles[bibfile].keys
+
     def get_entries(self, bibfiles: List[str]) -> Iterable["Entry"]:
         """Return all bibliography entries from the bib files, unsorted (i.e.
         in order of appearance in the bib files.
         """
-        for bibfile in bibfiles:
-            for key in self.bibdata.bibfiles[bibfile].keys:
-                yield self.bibdata.data.entries[key]
+        for key in self.get_keys(bibfiles):
+            yield self.bibdata.data.entries[key]
+
+    def get_filter(self, filter_: ast.AST) -> _Predicate:
+        """Return the parsed filter expression *filter_* compiled into
+        a function, compiling each distinct expression only once per build.
+        """
+        text = ast.dump(filter_)
+        predicate = self.filters.get(text)
+        if predicate is None:
+            try:
+                predicate = _compile_filter(filter_)
+            except ValueError:
+                # already reported when the bibliography was read
+                predicate = self.get_filter(_CITED_FILTER)
+            self.filters[text] = predicate
+        return predicate
+
+    def _get_candidate_keys(
+        self, bibliography: "BibliographyValue", filter_: ast.AST
+    ) -> Iterable[str]:
+        """Return the keys from the bib files of *bibliography* which could
+        satisfy the parsed filter expression *filter_*,
+        or which are listed in *bibliography*, in order of appearance.
+        """
+        prefix = bibliography.keyprefix
+        cited_keys = {
+            key[len(prefix) :] for key in self.cited_docnames if key.startswith(prefix)
+        }
+        keys = plan_filter(filter_, self.entry_index, self.bibdata, cited_keys)
+        if keys is None:
+            return self.get_keys(bibliography.bibfiles)
+        keys.update(bibliography.keys)
+        buckets: Dict[str, List[str]] = {
+            bibfile: [] for bibfile in bibliography.bibfiles
+        }
+        for key in keys:
+            for bibfile in self.entry_index.get_bibfiles(self.bibdata, key):
+                if bibfile in buckets:
+                    buckets[bibfile].append(key)
+        candidate_keys: List[str] = []
+        for bibfile, bucket in buckets.items():
+            positions = self.entry_index.get_positions(self.bibdata, bibfile)
+            candidate_keys.extend(sorted(bucket, key=positions.__getitem__))
+        return candidate_keys
 
     def get_filtered_entries(
         self, bibliography_key: "BibliographyKey"
     ) -> Iterable[Tuple[str, "Entry"]]:
         """Return unsorted bibliography entries filtered by the filter
         expression.
+        The keys of these entries are stored, and are only filtered again
+        if the expression, the bibliography data, or the citations
+        that the expression refers to have changed.
         """
         bibliography = self.bibliographies[bibliography_key]
-        for entry in self.get_entries(bibliography.bibfiles):
-            key = bibliography.keyprefix + entry.key
-            cited_docnames = {
-                citation_ref.docname
-                for citation_ref in self.citation_refs
-                if key in {target.key for target in citation_ref.targets}
-            }
-            visitor = _FilterVisitor(
-                entry=entry,
-                docname=bibliography_key.docname,
-                cited_docnames=cited_docnames,
+        predicate = self.get_filter(bibliography.filter_)
+        filter_ = (
+            _CITED_FILTER
+            if predicate is self.get_filter(_CITED_FILTER)
+            else bibliography.filter_
+        )
+        token = self._get_filtered_keys_token(bibliography, filter_)
+        filtered_keys = self.filtered_keys.get(bibliography_key)
+        if filtered_keys is None or filtered_keys[0] != token:
+            filtered_keys = token, list(
+                self._filter_keys(bibliography_key, predicate, filter_)
             )
+            self.filtered_keys[bibliography_key] = filtered_keys
+        entries = self.bibdata.data.entries
+        for entry_key in filtered_keys[1]:
+            yield bibliography.keyprefix + entry_key, entries[entry_key]
+
+    def _get_filtered_keys_token(
+        self, bibliography: "BibliographyValue", filter_: ast.AST
+    ) -> str:
+        """Return a hash of everything that the keys of the entries
+        satisfying the parsed filter expression *filter_* depend on:
+        the expression, the bibliography data, the options of *bibliography*,
+        and, if the expression refers to citations,
+        the documents in which the keys of its bib files are cited.
+        """
+        names = {node.id for node in ast.walk(filter_) if isinstance(node, ast.Name)}
+        citations: List[Tuple[str, List[str]]] = []
+        if names & {"cited", "docnames"}:
+            prefix = bibliography.keyprefix
+            bibfiles = set(bibliography.bibfiles)
+            citations = sorted(
+                (key, sorted(docnames))
+                for key, docnames in self.cited_docnames.items()
+                if key.startswith(prefix)
+                and not bibfiles.isdisjoint(
+                    self.entry_index.get_bibfiles(self.bibdata, key[len(prefix) :])
+                )
+            )
+        return _get_fingerprint(
+            ast.dump(filter_),
+            self.data["bibdata"].token,
+            repr(bibliography.bibfiles),
+            bibliography.keyprefix,
+            repr(bibliography.keys),
+            repr(citations),
+        )
+
+    def _filter_keys(
+        self,
+        bibliography_key: "BibliographyKey",
+        predicate: _Predicate,
+        filter_: ast.AST,
+    ) -> Iterable[str]:
+        """Return the keys of the entries of a bibliography which satisfy
+        *predicate*, compiled from the parsed filter expression *filter_*,
+        or which are listed in the bibliography.
+        """
+        bibliography = self.bibliographies[bibliography_key]
+        context = _FilterContext(self.bibdata.data.entries, bibliography_key.docname)
+        for entry_key in self._get_candidate_keys(bibliography, filter_):
+            cited_docnames = self.cited_docnames.get(
+                bibliography.keyprefix + entry_key, set()
+            )
+            context.set_key(entry_key, cited_docnames)
             try:
-                success = visitor.visit(bibliography.filter_)
+                success = predicate(context)
             except ValueError as err:
                 logger.warning(
                     "syntax error in :filter: expression; %s" % err,
@@ -525,8 +1022,8 @@ class BibtexDomain(Domain):
                 )
                 # recover by falling back to the default
                 success = bool(cited_docnames)
-            if success or entry.key in bibliography.keys:
-                yield key, entry
+            if success or entry_key in bibliography.keys:
+                yield entry_key
 
     def get_sorted_entries(
         self, bibliography_key: "BibliographyKey", docnames: List[str]
@@ -577,13 +1074,24 @@ class BibtexDomain(Domain):
         sorted_entries: Iterable[Entry] = style.sort(entries.values())
         labels = style.format_labels(sorted_entries)
         for label, entry in zip(labels, sorted_entries):
+            label = bibliography.labelprefix + label
             try:
                 yield (
                     entry,
-                    style.format_entry(bibliography.labelprefix + label, entry),
-                    style2.format_entry(bibliography.labelprefix + label, entry)
-                    if style2
-                    else None,
+                    format_entry(
+                        self.formatted_entries, bibliography.style, style, label, entry
+                    ),
+                    (
+                        format_entry(
+                            self.formatted_entries,
+                            tooltips_style or bibliography.style,
+                            style2,
+                            label,
+                            entry,
+                        )
+                        if style2
+                        else None
+                    ),
                 )
             except FieldIsMissing as exc:
                 logger.warning(
@@ -593,6 +1101,6 @@ class BibtexDomain(Domain):
                     subtype="missing_field",
                 )
                 formatted_error_entry = FormattedEntry(
-                    entry.key, Tag("b", str(exc)), bibliography.labelprefix + label
+                    entry.key, Tag("b", str(exc)), label
                 )
                 yield entry, formatted_error_entry, None
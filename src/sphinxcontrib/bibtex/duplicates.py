@@ -0,0 +1,127 @@
+"""
+    Detection of duplicate and nearly identical entries.
+
+    Entries are compared by their title and the last names of their authors
+    (or editors), and only entries from the same year are compared.
+    Entries for which these are identical, after normalising case, spacing,
+    punctuation, and LaTeX commands, are found by hashing.
+    Nearly identical entries are found by locality sensitive hashing:
+    a min-hash signature is computed for each entry,
+    and only entries that agree on a band of their signature are compared,
+    each with a bounded number of other entries in its band,
+    so the cost per entry does not grow with the number of entries.
+
+    .. autofunction:: find_duplicates
+"""
+
+import re
+import zlib
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from pybtex.database import Entry
+
+#: Number of bins of the min-hash signature of each entry.
+_BINS = 24
+#: Number of bins in each band of the signature.
+_ROWS = 3
+#: Minimal similarity of nearly identical entries.
+_THRESHOLD = 0.8
+#: Length of the substrings which are compared.
+_SHINGLE_LENGTH = 3
+#: Number of preceding entries in the same bucket each entry is compared to.
+_MAX_COMPARED = 8
+
+_NON_WORD = re.compile(r"\\[a-z]+|[^a-z0-9]+")
+
+
+def _get_text(entry: Entry) -> str:
+    """Return normalised title and last names of *entry*."""
+    persons = entry.persons.get("author") or entry.persons.get("editor") or []
+    parts = [
+        entry.fields.get("title", ""),
+        *(" ".join(person.last_names) for person in persons),
+    ]
+    return _NON_WORD.sub(" ", " ".join(parts).lower()).strip()
+
+
+def _get_shingles(text: str) -> Set[int]:
+    return {
+        zlib.crc32(text[i : i + _SHINGLE_LENGTH].encode())
+        for i in range(max(1, len(text) - _SHINGLE_LENGTH + 1))
+    }
+
+
+def _get_signature(shingles: Iterable[int]) -> List[Optional[int]]:
+    """Return one permutation min-hash signature of *shingles*:
+    each shingle goes into one of the bins,
+    and the signature holds the smallest hash in each bin.
+    """
+    signature: List[Optional[int]] = [None] * _BINS
+    for shingle in shingles:
+        bin_, value = shingle % _BINS, shingle // _BINS
+        old_value = signature[bin_]
+        if old_value is None or value < old_value:
+            signature[bin_] = value
+    return signature
+
+
+def _get_similarity(shingles1: Set[int], shingles2: Set[int]) -> float:
+    return len(shingles1 & shingles2) / len(shingles1 | shingles2)
+
+
+def _find_root(parents: Dict[str, str], key: str) -> str:
+    while parents[key] != key:
+        parents[key] = parents[parents[key]]
+        key = parents[key]
+    return key
+
+
+def _merge_similar(
+    groups: Dict[Tuple[str, str], List[str]], parents: Dict[str, str]
+) -> None:
+    """Merge groups of entries from the same year
+    whose texts are nearly identical.
+    """
+    shingles: Dict[str, Set[int]] = {}
+    buckets: Dict[Tuple[str, int, Tuple[Optional[int], ...]], List[str]] = {}
+    for (year, text), keys in groups.items():
+        key = keys[0]
+        shingles[key] = _get_shingles(text)
+        signature = _get_signature(shingles[key])
+        for start in range(0, _BINS, _ROWS):
+            band = tuple(signature[start : start + _ROWS])
+            if None not in band:  # empty bins say nothing about similarity
+                buckets.setdefault((year, start, band), []).append(key)
+    for bucket in buckets.values():
+        for i, key2 in enumerate(bucket):
+            for key1 in bucket[max(0, i - _MAX_COMPARED) : i]:
+                root1, root2 = _find_root(parents, key1), _find_root(parents, key2)
+                if root1 != root2 and (
+                    _get_similarity(shingles[key1], shingles[key2]) >= _THRESHOLD
+                ):
+                    parents[root2] = root1
+
+
+def find_duplicates(entries: Mapping[str, Entry]) -> List[Tuple[str, ...]]:
+    """Return groups of keys of *entries* which are identical
+    or nearly identical, in the order in which the keys first appear.
+    Entries without title, authors, and editors are ignored.
+    """
+    # identical entries
+    groups: Dict[Tuple[str, str], List[str]] = {}
+    for key, entry in entries.items():
+        text = _get_text(entry)
+        if text:
+            groups.setdefault((entry.fields.get("year", ""), text), []).append(key)
+    parents: Dict[str, str] = {}
+    for keys in groups.values():
+        for key in keys:
+            parents[key] = keys[0]
+    # nearly identical entries, comparing one entry of each group
+    _merge_similar(groups, parents)
+    # collect groups in order of appearance
+    duplicates: Dict[str, List[str]] = {}
+    for key in entries:
+        if key in parents:
+            duplicates.setdefault(_find_root(parents, key), []).append(key)
+    return [tuple(keys) for keys in duplicates.values() if len(keys) > 1]
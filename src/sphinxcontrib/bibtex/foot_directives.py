@@ -47,8 +47,7 @@ class FootBibliographyDirective(Directive):
                 foot_domain.bibliography_header.deepcopy(),
             )
             domain = cast("BibtexDomain", env.get_domain("cite"))
-            for bibfile in domain.bibdata.bibfiles:
-                env.note_dependency(bibfile)
+            domain.note_bibfiles(env.docname, domain.bibdata.bibfiles)
             foot_bibliography["ids"] += _make_ids(
                 docname=env.docname,
                 lineno=self.lineno,
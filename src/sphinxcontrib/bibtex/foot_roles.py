@@ -13,6 +13,7 @@ from pybtex.plugin import find_plugin
 from sphinx.roles import XRefRole
 from sphinx.util.logging import getLogger
 
+from .richtext import format_entry
 from .style.referencing import format_references
 from .style.template import FootReferenceInfo
 from .transforms import node_text_transform
@@ -72,7 +73,13 @@ class FootCiteRole(XRefRole):
         for key in keys:
             entry = domain.bibdata.data.entries.get(key)
             if entry is not None:
-                formatted_entry = style.format_entry(label="", entry=entry)
+                formatted_entry = format_entry(
+                    domain.formatted_entries,
+                    self.config.bibtex_default_style,
+                    style,
+                    "",
+                    entry,
+                )
                 if key not in (foot_old_refs | foot_new_refs):
                     footnote = docutils.nodes.footnote(auto=1)
                     # no automatic ids for footnotes: force non-empty template
@@ -0,0 +1,357 @@
+"""
+Indexes of the entries of the bib files, and planning of filter
+expressions with these indexes.
+
+Before a filter expression is evaluated for the entries of a
+bibliography, its conditions on the entry type, the key,
+and the fields of the entries, are looked up in an index,
+to find the entries which could possibly satisfy the expression.
+The expression is then only evaluated for these entries.
+Each index is built once per build, when it is first needed,
+so only fields which are used in filter expressions are indexed.
+
+.. autoclass:: EntryIndex
+    :members:
+
+.. autofunction:: plan_filter
+"""
+
+import ast
+import bisect
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from pybtex.database import Entry
+
+from .bibfile import BibData
+
+#: Identifiers whose value does not depend on the entry alone.
+_CITATION_NAMES = {"cited", "docname", "docnames"}
+
+#: Regular expressions which only match a literal word,
+#: possibly anchored at the start or the end of the string.
+_WORD = re.compile(r"\^?(\w+)\$?")
+
+#: Literal characters at the start of regular expressions anchored at the start.
+_PREFIX = re.compile(r"\^([A-Za-z0-9_:/-]*)")
+
+_WORDS = re.compile(r"\w+")
+
+#: Mirrored comparison operators, for comparisons with a constant on the left.
+_MIRRORED: Dict[type, type] = {
+    ast.Eq: ast.Eq,
+    ast.Lt: ast.Gt,
+    ast.LtE: ast.GtE,
+    ast.Gt: ast.Lt,
+    ast.GtE: ast.LtE,
+}
+
+
+def _get_persons(entry: Entry, role: str) -> str:
+    """Return the persons of *entry* with *role*, separated by "and"."""
+    if role in entry.persons:
+        return " and ".join(
+            str(person) for person in entry.persons[role]  # XXX needs fix in pybtex?
+        )
+    else:
+        return ""
+
+
+def _get_value(entry: Entry, name: str) -> str:
+    """Return the value of identifier *name* in a filter expression
+    for *entry*.
+    """
+    if name == "type":
+        return entry.type.lower()
+    elif name == "author" or name == "editor":
+        return _get_persons(entry, name)
+    else:
+        return entry.fields.get(name, "")
+
+
+def _get_constant(node: ast.AST) -> Optional[str]:
+    """Return the value of *node* if it is a string constant."""
+    if isinstance(node, ast.Constant):
+        value = node.value
+    else:
+        value = getattr(node, "s", None)  # Python 3.7
+    return value if isinstance(value, str) else None
+
+
+def _get_name(node: ast.AST) -> Optional[str]:
+    return node.id if isinstance(node, ast.Name) else None
+
+
+class EntryIndex:
+    """Indexes of the entries of the bib files.
+    The index of each field is built when it is first used.
+    The indexes only hold keys, so they are built from the *bibdata*
+    passed to each lookup, which must be the same for all lookups.
+    """
+
+    def __init__(self) -> None:
+        #: Maps each identifier to the keys for each of its values,
+        #: along with the sorted values.
+        self._values: Dict[str, Tuple[Dict[str, List[str]], List[str]]] = {}
+        #: Maps each identifier to the keys for each word in its values.
+        self._words: Dict[str, Dict[str, List[str]]] = {}
+        #: Sorted lower case keys which contain only ascii characters,
+        #: along with the keys, and the keys with other characters.
+        self._keys: Optional[Tuple[List[Tuple[str, str]], List[str]]] = None
+        #: Maps each bib file to the position of each of its keys.
+        self._positions: Dict[str, Dict[str, int]] = {}
+        #: Maps each key to the bib files which have it.
+        self._bibfiles: Optional[Dict[str, List[str]]] = None
+
+    @staticmethod
+    def _get_items(bibdata: BibData, name: str) -> Iterable[Tuple[str, str]]:
+        """Yield the key of each entry along with the value of
+        identifier *name*.
+        """
+        keys = dict.fromkeys(
+            key for bibfile in bibdata.bibfiles.values() for key in bibfile.keys
+        )
+        if name == "key":
+            for key in keys:
+                yield key, key.lower()
+        else:
+            entries = bibdata.data.entries
+            for key in keys:
+                yield key, _get_value(entries[key], name)
+
+    def _get_values(
+        self, bibdata: BibData, name: str
+    ) -> Tuple[Dict[str, List[str]], List[str]]:
+        if name not in self._values:
+            values: Dict[str, List[str]] = {}
+            for key, value in self._get_items(bibdata, name):
+                values.setdefault(value, []).append(key)
+            self._values[name] = values, sorted(values)
+        return self._values[name]
+
+    def get_equal(self, bibdata: BibData, name: str, value: str) -> Set[str]:
+        """Return the keys of the entries for which identifier *name*
+        equals *value*.
+        """
+        values, _ = self._get_values(bibdata, name)
+        return set(values.get(value, ()))
+
+    def get_compared(
+        self, bibdata: BibData, name: str, op: ast.cmpop, value: str
+    ) -> Set[str]:
+        """Return the keys of the entries for which identifier *name*
+        compares to *value* with the ordering operator *op*.
+        """
+        values, sorted_values = self._get_values(bibdata, name)
+        if isinstance(op, ast.Lt):
+            selected = sorted_values[: bisect.bisect_left(sorted_values, value)]
+        elif isinstance(op, ast.LtE):
+            selected = sorted_values[: bisect.bisect_right(sorted_values, value)]
+        elif isinstance(op, ast.Gt):
+            selected = sorted_values[bisect.bisect_right(sorted_values, value) :]
+        else:
+            selected = sorted_values[bisect.bisect_left(sorted_values, value) :]
+        return {key for value2 in selected for key in values[value2]}
+
+    def get_matching_words(
+        self, bibdata: BibData, name: str, match: Callable[[str], object]
+    ) -> Set[str]:
+        """Return the keys of the entries for which identifier *name*
+        has a word, that is, a maximal sequence of word characters,
+        for which *match* returns a true value.
+        """
+        if name not in self._words:
+            words: Dict[str, List[str]] = {}
+            for key, value in self._get_items(bibdata, name):
+                for word in set(_WORDS.findall(value)):
+                    words.setdefault(word, []).append(key)
+            self._words[name] = words
+        return {
+            key
+            for word, keys in self._words[name].items()
+            if match(word)
+            for key in keys
+        }
+
+    def get_prefixed(self, bibdata: BibData, prefix: str) -> Set[str]:
+        """Return the keys which start with the ascii string *prefix*,
+        ignoring case, along with all keys with other characters.
+        """
+        if self._keys is None:
+            ascii_keys: List[Tuple[str, str]] = []
+            other_keys: List[str] = []
+            for key, lower_key in self._get_items(bibdata, "key"):
+                if lower_key.isascii():
+                    ascii_keys.append((lower_key, key))
+                else:
+                    other_keys.append(key)
+            self._keys = sorted(ascii_keys), other_keys
+        ascii_keys, other_keys = self._keys
+        prefix = prefix.lower()
+        start = bisect.bisect_left(ascii_keys, (prefix, ""))
+        # all ascii keys starting with the prefix sort before this one
+        end = bisect.bisect_left(ascii_keys, (prefix + "\x80", ""), start)
+        return {key for _, key in ascii_keys[start:end]} | set(other_keys)
+
+    def get_positions(self, bibdata: BibData, bibfile: str) -> Dict[str, int]:
+        """Return the position of each key in *bibfile*."""
+        if bibfile not in self._positions:
+            self._positions[bibfile] = {
+                key: position
+                for position, key in enumerate(bibdata.bibfiles[bibfile].keys)
+            }
+        return self._positions[bibfile]
+
+    def get_bibfiles(self, bibdata: BibData, key: str) -> List[str]:
+        """Return the bib files which have an entry with *key*."""
+        if self._bibfiles is None:
+            self._bibfiles = {}
+            for bibfile_name, bibfile in bibdata.bibfiles.items():
+                for key2 in bibfile.keys:
+                    self._bibfiles.setdefault(key2, []).append(bibfile_name)
+        return self._bibfiles.get(key, [])
+
+
+def _is_safe(filter_: ast.AST) -> bool:
+    """Check that evaluating *filter_* cannot fail for any entry,
+    so entries which are not looked at would not have been reported.
+    """
+    for node in ast.walk(filter_):
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mod):
+            name = _get_name(node.left)
+            if (name in {"cited", "docnames"}) or (
+                name is None and _get_constant(node.left) is None
+            ):
+                return False
+            if _get_constant(node.right) is None:
+                return False
+    return True
+
+
+class _FilterPlanner(ast.NodeVisitor):
+    """Find the keys of the entries which could satisfy a filter expression.
+    Each visit method returns a set of keys which includes
+    all entries satisfying the expression of the node,
+    or ``None`` if the expression cannot be looked up in the indexes.
+    """
+
+    def __init__(self, index: EntryIndex, bibdata: BibData, cited_keys: Set[str]):
+        self.index = index
+        self.bibdata = bibdata
+        self.cited_keys = cited_keys
+
+    def visit_Module(self, node) -> Optional[Set[str]]:
+        return self.visit(node.body[0]) if len(node.body) == 1 else None
+
+    def visit_Expr(self, node) -> Optional[Set[str]]:
+        return self.visit(node.value)
+
+    def visit_BoolOp(self, node) -> Optional[Set[str]]:
+        plans = [self.visit(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            known = sorted((plan for plan in plans if plan is not None), key=len)
+            return set.intersection(*known) if known else None
+        elif None in plans:
+            return None
+        else:
+            return set.union(*plans)
+
+    def visit_Name(self, node) -> Optional[Set[str]]:
+        return set(self.cited_keys) if node.id == "cited" else None
+
+    def visit_BinOp(self, node) -> Optional[Set[str]]:
+        if isinstance(node.op, ast.BitAnd):
+            # a set of documents which has documents in common with docnames
+            # implies that the entry is cited
+            if "docnames" in (_get_name(node.left), _get_name(node.right)):
+                return set(self.cited_keys)
+            return None
+        name, pattern = _get_name(node.left), _get_constant(node.right)
+        if not isinstance(node.op, ast.Mod) or name is None or pattern is None:
+            return None
+        if name in _CITATION_NAMES:
+            return None
+        if name == "key" and "|" not in pattern:
+            match = _PREFIX.match(pattern)
+            if match:
+                prefix = match.group(1)
+                if pattern[match.end() : match.end() + 1] in {"*", "?", "{"}:
+                    prefix = prefix[:-1]  # last character is optional
+                if prefix:
+                    return self.index.get_prefixed(self.bibdata, prefix)
+        match = _WORD.fullmatch(pattern)
+        if match:
+            # the word can only be matched inside a word of the value
+            regex = re.compile(match.group(1), re.IGNORECASE)
+            return self.index.get_matching_words(self.bibdata, name, regex.search)
+        return None
+
+    def visit_Compare(self, node) -> Optional[Set[str]]:
+        if len(node.ops) != 1:
+            return None
+        left, op, right = node.left, node.ops[0], node.comparators[0]
+        if _get_name(right) == "docnames" and isinstance(op, ast.In):
+            return set(self.cited_keys)
+        name, value = _get_name(right), _get_constant(left)
+        if name is not None and value is not None:
+            if isinstance(op, ast.In):
+                return self._plan_substring(name, value)
+            elif type(op) in _MIRRORED:
+                return self._plan_compare(name, _MIRRORED[type(op)](), value)
+            return None
+        name = _get_name(left)
+        if name is None:
+            return None
+        elif isinstance(op, ast.In) and isinstance(right, ast.Set):
+            return self._plan_set(name, right.elts)
+        else:
+            return self._plan_compare(name, op, _get_constant(right))
+
+    def _plan_compare(
+        self, name: str, op: ast.cmpop, value: Optional[str]
+    ) -> Optional[Set[str]]:
+        if name in _CITATION_NAMES or value is None:
+            return None
+        elif isinstance(op, ast.Eq):
+            return self.index.get_equal(self.bibdata, name, value)
+        elif isinstance(op, (ast.Lt, ast.LtE, ast.Gt, ast.GtE)):
+            return self.index.get_compared(self.bibdata, name, op, value)
+        else:
+            return None
+
+    def _plan_set(self, name: str, elts: List[ast.expr]) -> Optional[Set[str]]:
+        if name in _CITATION_NAMES:
+            return None
+        if not all(isinstance(elt, ast.Constant) or hasattr(elt, "s") for elt in elts):
+            return None
+        # constants other than strings never equal a value
+        return {
+            key
+            for value in map(_get_constant, elts)
+            if value is not None
+            for key in self.index.get_equal(self.bibdata, name, value)
+        }
+
+    def _plan_substring(self, name: str, value: str) -> Optional[Set[str]]:
+        if name in _CITATION_NAMES or not _WORDS.fullmatch(value):
+            return None
+        return self.index.get_matching_words(
+            self.bibdata, name, lambda word: value in word
+        )
+
+    def generic_visit(self, node) -> None:
+        return None
+
+
+def plan_filter(
+    filter_: ast.AST, index: EntryIndex, bibdata: BibData, cited_keys: Set[str]
+) -> Optional[Set[str]]:
+    """Return the keys of all entries of *bibdata* which could satisfy
+    the parsed filter expression *filter_*,
+    looking up its conditions in *index*,
+    or ``None`` if all entries must be evaluated.
+    The *cited_keys* are the keys of all entries which are cited.
+    """
+    if not _is_safe(filter_):
+        return None
+    return _FilterPlanner(index, bibdata, cited_keys).visit(filter_)
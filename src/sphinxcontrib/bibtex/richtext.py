@@ -1,7 +1,13 @@
 from abc import ABC
-from typing import Generic, TypeVar
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Generic, Iterator, Mapping, Tuple, TypeVar
 
-from pybtex.richtext import BaseMultipartText, BaseText
+from pybtex.richtext import BaseMultipartText, BaseText, Text
+
+if TYPE_CHECKING:
+    from pybtex.database import Entry
+    from pybtex.style import FormattedEntry
+    from pybtex.style.formatting import BaseStyle
 
 ReferenceInfo = TypeVar("ReferenceInfo")
 """Generic type parameter for types that store reference information.
@@ -23,3 +29,54 @@ class BaseReferenceText(BaseMultipartText, Generic[ReferenceInfo], ABC):
     def __init__(self, info: ReferenceInfo, *parts: "BaseText"):
         self.info = (info,)
         super().__init__(*parts)
+
+
+@lru_cache(maxsize=65536)
+def text_from_latex(latex: str) -> Text:
+    """Parse *latex* into rich text, like :meth:`pybtex.richtext.Text.from_latex`,
+    interning the result, so identical field values,
+    such as journal and publisher names, are parsed only once.
+    Rich text is not modified after construction,
+    so the parsed text can safely be shared.
+    """
+    return Text.from_latex(latex)
+
+
+class RichFields(Mapping[str, Text]):
+    """Rich text of the *fields* of an entry,
+    parsed by :func:`text_from_latex` when they are looked up.
+    """
+
+    def __init__(self, fields: Mapping[str, str]):
+        self._fields = fields
+
+    def __getitem__(self, key: str) -> Text:
+        return text_from_latex(self._fields[key])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+
+def format_entry(
+    cache: Dict[Tuple[str, str, str], "FormattedEntry"],
+    style_name: str,
+    style: "BaseStyle",
+    label: str,
+    entry: "Entry",
+) -> "FormattedEntry":
+    """Format *entry* with *label* by *style*,
+    an instance of the pybtex formatting style plugin *style_name*,
+    memoised in *cache*, so entries which are cited in several
+    bibliographies, tooltips, or footnotes, are formatted only once.
+    Rich text is not modified after construction,
+    so the formatted entries can safely be shared.
+    """
+    cache_key = (style_name, label, entry.key)
+    try:
+        return cache[cache_key]
+    except KeyError:
+        formatted_entry = cache[cache_key] = style.format_entry(label, entry)
+        return formatted_entry
@@ -46,12 +46,13 @@ class CiteRole(XRefRole):
             node["reftype"] = "p"
         document.note_explicit_target(node, node)  # for backrefs
         domain = cast("BibtexDomain", env.get_domain("cite"))
-        domain.citation_refs.append(
-            CitationRef(
-                citation_ref_id=node["ids"][0],
-                docname=env.docname,
-                line=document.line,
-                targets=list(parse_citation_targets(self.target)),
-            )
+        citation_ref = CitationRef(
+            citation_ref_id=node["ids"][0],
+            docname=env.docname,
+            line=document.line,
+            targets=list(parse_citation_targets(self.target)),
         )
+        domain.citation_refs.append(citation_ref)
+        for target in citation_ref.targets:
+            domain.cited_docnames.setdefault(target.key, set()).add(env.docname)
         return [node], []
@@ -13,7 +13,7 @@ from sphinxcontrib.bibtex.style.template import (
 )
 
 if TYPE_CHECKING:
-    from pybtex.database import Entry
+    from pybtex.database import Entry, Person
     from pybtex.richtext import BaseText
     from pybtex.style import FormattedEntry
     from pybtex.style.names import BaseNameStyle
@@ -150,11 +150,36 @@ class PersonStyle:
         default_factory=lambda: Text(" ", Tag("em", "et al."))
     )
 
+    #: Formatted person names, by their parts.
+    #: Automatically filled by :meth:`format`.
+    formatted_names: Dict[Tuple[Tuple[str, ...], ...], "BaseText"] = field(
+        init=False, default_factory=dict, repr=False, compare=False
+    )
+
     def __post_init__(self):
         self.style_plugin = pybtex.plugin.find_plugin(
             "pybtex.style.names", name=self.style
         )()
 
+    def format(self, person: "Person") -> "BaseText":
+        """Returns the formatted name of the person.
+        Each distinct name is formatted only once.
+        """
+        key = (
+            tuple(person.first_names),
+            tuple(person.middle_names),
+            tuple(person.prelast_names),
+            tuple(person.last_names),
+            tuple(person.lineage_names),
+        )
+        try:
+            return self.formatted_names[key]
+        except KeyError:
+            text = self.formatted_names[key] = self.style_plugin.format(
+                person, self.abbreviate
+            ).format()
+            return text
+
     def names(self, role: str, full: bool) -> "Node":
         """Returns a template formatting the persons with correct separators
         and using the full person list if so requested.
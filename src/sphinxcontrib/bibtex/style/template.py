@@ -21,15 +21,9 @@ from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, cast
 import docutils.nodes
 import pybtex_docutils
 from pybtex.richtext import Text
-from pybtex.style.template import (
-    FieldIsMissing,
-    Node,
-    _format_list,
-    field,
-    first_of,
-    optional,
-    tag,
-)
+from pybtex.style.template import FieldIsMissing, Node, _format_list
+from pybtex.style.template import field as _field
+from pybtex.style.template import first_of, optional, tag
 from sphinx.util.nodes import make_refnode
 
 from sphinxcontrib.bibtex.nodes import raw_latex
@@ -118,10 +112,7 @@ def names(children, data, role, **kwargs):
     except KeyError:
         raise FieldIsMissing(role, data["entry"])
     style = data["style"]
-    formatted_names = [
-        style.person.style_plugin.format(person, style.person.abbreviate)
-        for person in persons
-    ]
+    formatted_names = [style.person.format(person) for person in persons]
     return join(**kwargs)[formatted_names].format_data(data)
 
 
@@ -265,6 +256,19 @@ def footnote_reference(children, data: Dict[str, Any]):
     return FootReferenceText(info, "#")
 
 
+# extended from pybtex: takes rich text from the rich_fields of the entry
+@node
+def field(children, data, name, apply_func=None, raw=False):
+    """Return the contents of the bibliography entry field."""
+    assert not children
+    entry = data["entry"]
+    rich_fields = getattr(entry, "rich_fields", None)
+    if raw or rich_fields is None or name not in entry.fields:
+        return _field(name, apply_func=apply_func, raw=raw).format_data(data)
+    value = rich_fields[name]
+    return apply_func(value) if apply_func else value
+
+
 @node
 def year(children, data: Dict[str, Any]) -> "BaseText":
     assert not children
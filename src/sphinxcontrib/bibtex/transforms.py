@@ -81,10 +81,14 @@ class BibliographyTransform(SphinxPostTransform):
             else:  # "citation"
                 nodes = []
             for citation in citations:
-                citation_node = bibliography.citation_nodes[citation.key]
+                citation_node: docutils.nodes.Element
                 if bibliography.list_ in {"enumerated", "bullet"}:
+                    citation_node = docutils.nodes.list_item(
+                        ids=[citation.citation_id]
+                    )
                     citation_node += self.backend.paragraph(citation.formatted_entry)
                 else:  # "citation"
+                    citation_node = docutils.nodes.citation(ids=[citation.citation_id])
                     # backrefs only supported in same document
                     backrefs = [
                         citation_ref.citation_ref_id
@@ -100,6 +104,8 @@ class BibliographyTransform(SphinxPostTransform):
                     )
                     citation_node += self.backend.paragraph(citation.formatted_entry)
                 citation_node["docname"] = bib_key.docname
+                # ids made later on must not clash with this one
+                self.document.ids.setdefault(citation.citation_id, citation_node)
                 node_text_transform(citation_node)
                 nodes.append(citation_node)
                 if bibliography.list_ == "enumerated":
@@ -0,0 +1,17 @@
+extensions = ["sphinxcontrib.bibtex"]
+exclude_patterns = ["_build"]
+bibtex_bibfiles = ["test.bib"]
+
+
+def entries_changed(app, env, added, modified, removed):
+    app.bibtex_entries_changed.append((added, modified, removed))
+    entries = env.get_domain("cite").bibdata.data.entries
+    app.bibtex_entries_changed_titles.update(
+        (key, entries[key].fields["title"]) for key in added | modified
+    )
+
+
+def setup(app):
+    app.bibtex_entries_changed = []
+    app.bibtex_entries_changed_titles = {}
+    app.connect("bibtex-entries-changed", entries_changed)
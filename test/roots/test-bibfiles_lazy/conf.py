@@ -0,0 +1,4 @@
+extensions = ["sphinxcontrib.bibtex"]
+exclude_patterns = ["_build"]
+bibtex_bibfiles = ["test.bib"]
+bibtex_lazy_parsing = True
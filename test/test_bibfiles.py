@@ -1,12 +1,32 @@
+import gzip
+import lzma
+import os
+import pickle
 import re
 import shutil
+import sqlite3
 import time
 from test.common import html_citations
 
+import pybtex.database
 import pytest
+from pybtex.database import BibliographyData
 from pybtex.exceptions import PybtexError
 from sphinx.errors import ExtensionError
 
+from sphinxcontrib.bibtex.bibfile import (
+    BibCache,
+    BibDataRef,
+    BibFile,
+    compile_bibfile,
+    expand_filename,
+    get_digest,
+    get_entry_changes,
+    load_compiled_bibfile,
+    parse_bibdata,
+    parse_bibfile,
+)
+
 status_up_to_date = "checking bibtex cache.*up to date"
 status_out_of_date = "checking bibtex cache.*out of date"
 status_parsing = "parsing bibtex file.*parsed [0-9]+ entries"
@@ -56,6 +76,350 @@ def test_bibfiles_out_of_date(make_app, app_params) -> None:
     assert re.search(status_parsing, status) is None
 
 
+# Test that changing the modification time of a bib file without
+# changing its contents does not cause it, nor the documents using it,
+# to be read again.
+@pytest.mark.sphinx("html", testroot="bibfiles_out_of_date")
+def test_bibfiles_touch(make_app, app_params) -> None:
+    args, kwargs = app_params
+    app = make_app(*args, freshenv=True, **kwargs)
+    app.build()
+    bibfile = app.srcdir / "test.bib"
+    mtime = time.time() + 10  # newer than when the documents were read
+    os.utime(bibfile, (mtime, mtime))
+    app = make_app(*args, **kwargs)
+    app.build()
+    status = app._status.getvalue()
+    assert re.search(status_up_to_date, status) is not None
+    assert re.search(status_parsing, status) is None
+    assert "no targets are out of date" in status
+
+
+# Test that parsed data is stored outside the environment, and that
+# it is parsed again if it goes missing.
+@pytest.mark.sphinx("html", testroot="bibfiles_out_of_date")
+def test_bibfiles_bibdata_file(make_app, app_params) -> None:
+    args, kwargs = app_params
+    app = make_app(*args, freshenv=True, **kwargs)
+    app.build()
+    domain = app.env.get_domain("cite")
+    assert isinstance(domain.data["bibdata"], BibDataRef)
+    assert os.path.isfile(domain.bibdata_filename)
+    os.remove(domain.bibdata_filename)
+    app = make_app(*args, **kwargs)
+    app.build()
+    status = app._status.getvalue()
+    assert re.search(status_up_to_date, status) is not None
+    assert re.search(status_parsing, status) is not None
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(label="1", text=".*Akkerdju.*").search(output)
+
+
+# Test that parsed data is released after reading, and loaded again
+# when needed.
+@pytest.mark.sphinx(
+    "html",
+    testroot="bibfiles_lazy",
+    freshenv=True,
+    confoverrides={"bibtex_prune_entries": True},
+)
+def test_bibfiles_prune_entries(app, warning) -> None:
+    app.build()
+    assert not warning.getvalue()
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(text=".*Bro.*Journal of Akkerdju.*").search(output)
+    domain = app.env.get_domain("cite")
+    assert domain._bibdata is None
+    assert [citation.key for citation in domain.citations] == ["test1"]
+    assert "test3" in domain.bibdata.data.entries
+
+
+def status_parsing_file(filename: str) -> str:
+    return r"parsing bibtex file .*{0}\.\.\. parsed".format(re.escape(filename))
+
+
+# Test that only bib files which are out of date are parsed again.
+@pytest.mark.sphinx("html", testroot="bibfiles_incremental")
+def test_bibfiles_incremental(make_app, app_params) -> None:
+    args, kwargs = app_params
+    app = make_app(*args, **kwargs)
+    app.build()
+    status = app._status.getvalue()
+    for filename in ["macros.bib", "test1.bib", "test2.bib"]:
+        assert re.search(status_parsing_file(filename), status) is not None
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(text=".*Bro.*Journal of Akkerdju.*").search(output)
+    assert html_citations(text=".*Chap.*").search(output)
+    # wait to ensure different timestamp
+    time.sleep(0.1)
+    shutil.copyfile((app.srcdir / "test2_new.xxx"), (app.srcdir / "test2.bib"))
+    app = make_app(*args, **kwargs)
+    app.build()
+    status = app._status.getvalue()
+    assert re.search(status_out_of_date, status) is not None
+    assert re.search(status_parsing_file("macros.bib"), status) is None
+    assert re.search(status_parsing_file("test1.bib"), status) is None
+    assert re.search(status_parsing_file("test2.bib"), status) is not None
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(text=".*Bro.*Journal of Akkerdju.*").search(output)
+    assert html_citations(text=".*Giggles.*").search(output)
+    # changing a macro also reparses the files that use it
+    time.sleep(0.1)
+    shutil.copyfile((app.srcdir / "macros_new.xxx"), (app.srcdir / "macros.bib"))
+    app = make_app(*args, **kwargs)
+    app.build()
+    status = app._status.getvalue()
+    assert re.search(status_out_of_date, status) is not None
+    assert re.search(status_parsing_file("macros.bib"), status) is not None
+    assert re.search(status_parsing_file("test1.bib"), status) is not None
+    assert re.search(status_parsing_file("test2.bib"), status) is None
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(text=".*Bro.*Journal of Eminence.*").search(output)
+    assert html_citations(text=".*Giggles.*").search(output)
+
+
+# Test that parsed bib files are shared between builds through the cache.
+@pytest.mark.sphinx("html", testroot="bibfiles_multiple_macros")
+def test_bibfiles_cache_dir(make_app, app_params, tmp_path) -> None:
+    args, kwargs = app_params
+    confoverrides = {"bibtex_cache_dir": str(tmp_path)}
+    app = make_app(*args, freshenv=True, confoverrides=confoverrides, **kwargs)
+    app.build()
+    status = app._status.getvalue()
+    assert re.search(status_parsing, status) is not None
+    assert len(list(tmp_path.glob("*.pickle"))) == 2
+    app = make_app(*args, freshenv=True, confoverrides=confoverrides, **kwargs)
+    app.build()
+    status = app._status.getvalue()
+    assert re.search(status_parsing, status) is None
+    assert len(re.findall("loaded [0-9]+ entries from bibtex cache", status)) == 2
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(label="1", text=r".*Rev\. Mod\. Phys\..*").search(output)
+
+
+# Test that lazily parsed entries shared through the cache are read
+# from the bib file of the project which uses them.
+def test_bibfiles_cache_dir_lazy(make_app, rootdir, tmp_path) -> None:
+    confoverrides = {"bibtex_cache_dir": str(tmp_path / "cache")}
+    for name in ["a", "b"]:
+        shutil.copytree(rootdir / "test-bibfiles_lazy", tmp_path / name)
+    app = make_app("html", srcdir=tmp_path / "a", confoverrides=confoverrides)
+    app.build()
+    os.remove(tmp_path / "a" / "test.bib")
+    app = make_app("html", srcdir=tmp_path / "b", confoverrides=confoverrides)
+    app.build()
+    status = app._status.getvalue()
+    assert re.search("loaded [0-9]+ entries from bibtex cache", status)
+    assert "test.bib" not in app._warning.getvalue()
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(text=".*Bro.*").search(output)
+
+
+def test_bibfiles_cache_evict(tmp_path) -> None:
+    bibfile = BibFile(
+        mtime=0,
+        digest="",
+        keys={},
+        data=BibliographyData(),
+        macros={},
+        used_macros={},
+        crossrefs={},
+        fingerprints={},
+    )
+    size = len(pickle.dumps(bibfile, protocol=pickle.HIGHEST_PROTOCOL))
+    cache = BibCache(dirname=str(tmp_path), max_size=2 * size)
+    for digest in ["a", "b", "c"]:
+        cache.store(digest, "utf-8", bibfile)
+        time.sleep(0.1)
+    # files are only evicted once all are stored
+    assert len(list(tmp_path.glob("*.pickle"))) == 3
+    cache.evict()
+    assert cache.load("a", "utf-8") is None
+    assert cache.load("b", "utf-8") is not None
+    assert cache.load("c", "utf-8") is not None
+
+
+# Test that lazy and eager builds do not overwrite each other's cache files.
+def test_bibfiles_cache_lazy_eager(rootdir, tmp_path, monkeypatch) -> None:
+    bibfilenames = [str(rootdir / "test-bibfiles_lazy" / "test.bib")]
+    cache = BibCache(dirname=str(tmp_path), max_size=2**30)
+    for lazy in [False, True]:
+        parse_bibdata(bibfilenames, "utf-8", cache=cache, lazy=lazy)
+    assert len(list(tmp_path.glob("*.pickle"))) == 2
+
+    def parse_bibfile(*args, **kwargs):
+        raise AssertionError("bib file parsed instead of loaded from cache")
+
+    monkeypatch.setattr("sphinxcontrib.bibtex.bibfile.parse_bibfile", parse_bibfile)
+    for lazy in [False, True]:
+        bibdata = parse_bibdata(bibfilenames, "utf-8", cache=cache, lazy=lazy)
+        assert bibdata.data.entries
+
+
+def test_bibfiles_cache_read_only(tmp_path, monkeypatch) -> None:
+    bibfile = BibFile(
+        mtime=0,
+        digest="",
+        keys={},
+        data=BibliographyData(),
+        macros={},
+        used_macros={},
+        crossrefs={},
+        fingerprints={},
+    )
+    cache = BibCache(dirname=str(tmp_path), max_size=2**20)
+    cache.store("a", "utf-8", bibfile)
+
+    def utime(filename):
+        raise PermissionError(filename)
+
+    monkeypatch.setattr(os, "utime", utime)
+    assert cache.load("a", "utf-8") == bibfile
+
+
+@pytest.mark.sphinx(
+    "html",
+    testroot="bibfiles_multiple_macros",
+    freshenv=True,
+    confoverrides={"bibtex_parse_jobs": 2},
+)
+def test_bibfiles_parse_jobs(app, warning) -> None:
+    app.build()
+    assert not warning.getvalue()
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(label="1", text=r".*Rev\. Mod\. Phys\..*").search(output)
+
+
+@pytest.mark.sphinx(
+    "html",
+    testroot="bibfiles_multiple_keys",
+    freshenv=True,
+    confoverrides={"bibtex_parse_jobs": 2},
+)
+def test_bibfiles_parse_jobs_multiple_keys(app, warning) -> None:
+    app.build()
+    assert re.search(
+        "bibliography data error in .*test2.bib: repeated", warning.getvalue()
+    )
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(label="1", text=".*Test one.*").search(output)
+
+
+@pytest.mark.sphinx("html", testroot="bibfiles_lazy", freshenv=True)
+def test_bibfiles_lazy(app, warning) -> None:
+    app.build()
+    assert not warning.getvalue()
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(
+        text=".*Bro.*Nested Braces Inside title.*Journal of Akkerdju.*"
+    ).search(output)
+    assert "Never Cited" not in output
+    # only the cited entry was parsed
+    domain = app.env.get_domain("cite")
+    bibfile = domain.bibdata.bibfiles[os.path.normpath(app.srcdir / "test.bib")]
+    assert list(bibfile.data.entries.entries) == ["test1"]
+
+
+# Test that entries rejected by pybtex are reported once, and do not
+# stop the build.
+@pytest.mark.sphinx("html", testroot="bibfiles_lazy_data_error", freshenv=True)
+def test_bibfiles_lazy_data_error(app, warning) -> None:
+    app.build()
+    assert warning.getvalue().count("bibliography data error") == 1
+    assert "duplicate title field" in warning.getvalue()
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(text=".*Good entry.*").search(output)
+
+
+def test_bibfiles_lazy_entries(rootdir) -> None:
+    bibfilename = str(rootdir / "test-bibfiles_lazy" / "test.bib")
+    macros = {"jnl": "Journal", "unused": "Unused"}
+    bibfile = parse_bibfile(bibfilename, "utf-8", macros, lazy=True)
+    entries = bibfile.data.entries
+    assert bibfile.used_macros == {}
+    assert list(bibfile.keys) == ["test1", "test2", "test3"]
+    assert bibfile.macros == {"jnl": "Journal of Akkerdju"}
+    assert bibfile.data.preamble_list == [r"\newcommand{\noop}[1]{}"]
+    assert not entries.entries
+    # only macros that entries use are kept
+    assert entries.macros == {"jnl": "Journal of Akkerdju"}
+    assert entries["TEST2"].fields["title"] == "Parenthesis ) in Quotes"
+    assert list(entries.entries) == ["test2"]
+    # lazily parsed entries are the same as eagerly parsed entries
+    eager_entries = parse_bibfile(bibfilename, "utf-8", {}).data.entries
+    for key in bibfile.keys:
+        assert entries[key].type == eager_entries[key].type
+        assert entries[key].fields == eager_entries[key].fields
+        assert entries[key].persons == eager_entries[key].persons
+
+
+def test_bibfiles_compact_entries(rootdir) -> None:
+    bibfilename = str(rootdir / "test-bibfiles_lazy" / "test.bib")
+    entries = parse_bibfile(bibfilename, "utf-8", {}).data.entries
+    pybtex_entries = pybtex.database.parse_file(bibfilename).entries
+    assert list(entries) == list(pybtex_entries)
+    for key, pybtex_entry in pybtex_entries.items():
+        entry = entries[key.upper()]
+        assert entry is entries[key]
+        assert entry.key == key
+        assert entry.original_type == pybtex_entry.original_type
+        assert entry == pybtex_entry
+    # field names are shared between entries
+    title1, title3 = (next(iter(entries[key].fields)) for key in ["test1", "test3"])
+    assert title1 == "title"
+    assert title1 is title3
+    assert pickle.loads(pickle.dumps(entries))["test2"] == entries["test2"]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_bibfiles_shared_persons(tmp_path, lazy) -> None:
+    bibfilename = str(tmp_path / "test.bib")
+    with open(bibfilename, "w") as stream:
+        stream.write(
+            "@Misc{test1, author = {Jane Doe and John Smith}}\n"
+            "@Misc{test2, author = {Jane Doe}, editor = {John Smith}}\n"
+        )
+    entries = parse_bibfile(bibfilename, "utf-8", {}, lazy=lazy).data.entries
+    doe1, smith1 = entries["test1"].persons["author"]
+    doe2 = entries["test2"].persons["author"][0]
+    smith2 = entries["test2"].persons["editor"][0]
+    assert doe1 is doe2
+    assert smith1 is smith2
+    assert str(smith1) == "Smith, John"
+
+
+def test_bibfiles_compile(tmp_path, rootdir) -> None:
+    bibfilename = str(tmp_path / "test.bib")
+    shutil.copyfile(rootdir / "test-bibfiles_lazy" / "test.bib", bibfilename)
+    assert compile_bibfile(bibfilename) == bibfilename + "c"
+    digest = get_digest(bibfilename)
+    bibfile = load_compiled_bibfile(bibfilename, "utf-8-sig", digest)
+    assert bibfile is not None
+    assert list(bibfile.keys) == ["test1", "test2", "test3"]
+    assert bibfile.data.entries["test1"].fields["journal"] == "Journal of Akkerdju"
+    assert load_compiled_bibfile(bibfilename, "latin-1", digest) is None
+    with open(bibfilename, "a") as stream:
+        stream.write("@Misc{test4}\n")
+    assert (
+        load_compiled_bibfile(bibfilename, "utf-8-sig", get_digest(bibfilename)) is None
+    )
+
+
+# Test that compiled bib files are loaded instead of parsed.
+@pytest.mark.sphinx("html", testroot="bibfiles_lazy", freshenv=True)
+def test_bibfiles_compiled(make_app, app_params) -> None:
+    args, kwargs = app_params
+    compile_bibfile(str(kwargs["srcdir"] / "test.bib"))
+    confoverrides = {"bibtex_lazy_parsing": False}
+    app = make_app(*args, confoverrides=confoverrides, **kwargs)
+    app.build()
+    status = app._status.getvalue()
+    assert re.search(status_parsing, status) is None
+    assert re.search("loaded 3 entries from compiled bibtex file", status)
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(text=".*Bro.*Journal of Akkerdju.*").search(output)
+
+
 @pytest.mark.sphinx("html", testroot="bibfiles_not_found")
 def test_bibfiles_not_found(app, warning) -> None:
     app.build()
@@ -105,6 +469,252 @@ def test_bibfiles_encoding_invalid(make_app, app_params) -> None:
         make_app(*args, **kwargs)
 
 
+@pytest.mark.sphinx("html", testroot="bibfiles_glob", freshenv=True)
+def test_bibfiles_glob(app, warning) -> None:
+    app.build()
+    assert not warning.getvalue()
+    domain = app.env.get_domain("cite")
+    assert [
+        os.path.relpath(bibfile, app.srcdir) for bibfile in domain.bibdata.bibfiles
+    ] == [
+        os.path.join("bibs", "a.bib"),
+        os.path.join("bibs", "sub", "b.bib"),
+        os.path.join("other", "c.bib"),
+    ]
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(label="1", text=".*Akkerdju.*").search(output)
+    assert html_citations(label="2", text=".*Bro.*").search(output)
+    assert html_citations(label="O1", text=".*Chap.*").search(output)
+    assert "Dude" not in output
+
+
+@pytest.mark.sphinx(
+    "html",
+    testroot="bibfiles_glob",
+    freshenv=True,
+    confoverrides={"bibtex_bibfiles": ["bibs", "nomatch/*.bib"]},
+)
+def test_bibfiles_glob_no_match(app, warning) -> None:
+    app.build()
+    assert "could not open bibtex file nomatch/*.bib." in warning.getvalue()
+    domain = app.env.get_domain("cite")
+    assert len(domain.bibdata.bibfiles) == 2
+
+
+def test_bibfiles_compressed(tmp_path, rootdir) -> None:
+    with open(rootdir / "test-bibfiles_lazy" / "test.bib", "rb") as stream:
+        contents = stream.read()
+    with gzip.open(tmp_path / "test.bib.gz", "wb") as stream:
+        stream.write(contents)
+    with lzma.open(tmp_path / "test2.bib.xz", "wb") as stream:
+        stream.write(contents.replace(b"test", b"other"))
+    (tmp_path / "broken.bib.gz").write_bytes(b"not compressed")
+    bibfilenames = expand_filename(str(tmp_path))
+    assert [os.path.basename(bibfile) for bibfile in bibfilenames] == [
+        "broken.bib.gz",
+        "test.bib.gz",
+        "test2.bib.xz",
+    ]
+    # compressed bib files cannot be scanned, so are fully parsed
+    bibdata = parse_bibdata(bibfilenames, "utf-8", lazy=True)
+    assert list(bibdata.data.entries) == [
+        "test1",
+        "test2",
+        "test3",
+        "other1",
+        "other2",
+        "other3",
+    ]
+    assert bibdata.data.entries["other1"].fields["journal"] == "Journal of Akkerdju"
+    # unchanged compressed bib files are not parsed again
+    bibdata2 = parse_bibdata(bibfilenames, "utf-8", bibdata, lazy=True)
+    for bibfilename in bibfilenames:
+        bibfile = bibdata2.bibfiles[bibfilename]
+        assert bibfile.data is bibdata.bibfiles[bibfilename].data
+        assert bibfile.digest == get_digest(bibfilename)
+
+
+def test_bibfiles_database(tmp_path, rootdir) -> None:
+    bibfilename = str(tmp_path / "test.bib")
+    shutil.copyfile(rootdir / "test-bibfiles_lazy" / "test.bib", bibfilename)
+    dbfilename = str(tmp_path / "test.db")
+    with sqlite3.connect(dbfilename) as connection:
+        connection.execute(
+            "CREATE TABLE entries "
+            "(key TEXT PRIMARY KEY COLLATE NOCASE, bibtex TEXT NOT NULL)"
+        )
+        connection.executemany(
+            "INSERT INTO entries VALUES (?, ?)",
+            [
+                ("Db1", "@Article{Db1, title = {Database}, journal = jnl}"),
+                ("db2", "@InBook{db2, chapter = {Two}, crossref = {test2}}"),
+            ],
+        )
+    connection.close()
+    bibdata = parse_bibdata([bibfilename, dbfilename], "utf-8")
+    assert list(bibdata.data.entries) == ["test1", "test2", "test3", "Db1", "db2"]
+    entries = bibdata.bibfiles[dbfilename].data.entries
+    assert entries.entries == {}
+    # macros from other bib files are expanded
+    assert bibdata.data.entries["db1"].fields["journal"] == "Journal of Akkerdju"
+    assert list(entries.entries) == ["db1"]
+    assert bibdata.data.entries["db2"].fields["publisher"] == "Publisher"
+    assert bibdata.data.entries.get("db3") is None
+    # all queries share one connection
+    connection = entries._connection
+    assert connection is not None
+    entries.entries.clear()
+    assert entries["db1"].fields["title"] == "Database"
+    assert entries._connection is connection
+    assert pickle.loads(pickle.dumps(entries))._connection is None
+    # the database is read again only if it changes or macros change
+    bibdata2 = parse_bibdata([bibfilename, dbfilename], "utf-8", bibdata)
+    assert bibdata2.bibfiles[dbfilename].data is bibdata.bibfiles[dbfilename].data
+    with open(bibfilename, "a") as stream:
+        stream.write('@String{jnl = "Other Journal"}\n')
+    bibdata3 = parse_bibdata([bibfilename, dbfilename], "utf-8", bibdata)
+    assert bibdata3.data.entries["db1"].fields["journal"] == "Other Journal"
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_bibfiles_entry_changes(tmp_path, lazy) -> None:
+    macrosfilename = str(tmp_path / "macros.bib")
+    bibfilename = str(tmp_path / "test.bib")
+    bibfilenames = [macrosfilename, bibfilename]
+    (tmp_path / "macros.bib").write_text('@String{jnl = "Journal"}\n')
+    (tmp_path / "test.bib").write_text(
+        "@Article{test1, journal = jnl}\n"
+        "@Book{test2, title = {Two}}\n"
+        "@InBook{test3, crossref = {test2}}\n"
+        "@Misc{test4}\n"
+    )
+    bibdata = parse_bibdata(bibfilenames, "utf-8", lazy=lazy)
+    changes = get_entry_changes(None, bibdata)
+    assert changes.added == {"test1", "test2", "test3", "test4"}
+    assert not changes.modified and not changes.removed
+    # entries which use changed macros or crossref parents are modified too
+    (tmp_path / "macros.bib").write_text('@String{jnl = "Other Journal"}\n')
+    (tmp_path / "test.bib").write_text(
+        "@Article{test1, journal = jnl}\n"
+        "@Book{test2, title = {Two, Revised}}\n"
+        "@InBook{test3, crossref = {test2}}\n"
+        "@Misc{test5}\n"
+    )
+    bibdata2 = parse_bibdata(bibfilenames, "utf-8", bibdata, lazy=lazy)
+    changes = get_entry_changes(bibdata, bibdata2)
+    assert changes.added == {"test5"}
+    assert changes.modified == {"test1", "test2", "test3"}
+    assert changes.removed == {"test4"}
+    assert not any(get_entry_changes(bibdata2, bibdata2))
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_bibfiles_entries_changed(make_app, rootdir, tmp_path, background) -> None:
+    srcdir = tmp_path / "src"
+    shutil.copytree(rootdir / "test-bibfiles_entries_changed", srcdir)
+    args = ("html",)
+    kwargs = dict(
+        srcdir=srcdir, confoverrides={"bibtex_parse_background": background}
+    )
+    app = make_app(*args, **kwargs)
+    app.build()
+    assert app.bibtex_entries_changed == [({"test1", "test2"}, set(), set())]
+    # handlers can use the domain
+    assert app.bibtex_entries_changed_titles == {"test1": "One", "test2": "Two"}
+    # no event if nothing changed
+    app = make_app(*args, **kwargs)
+    app.build()
+    assert app.bibtex_entries_changed == []
+    # no event if previous entries are unknown
+    os.remove(app.env.get_domain("cite").bibdata_filename)
+    app = make_app(*args, **kwargs)
+    app.build()
+    assert app.bibtex_entries_changed == []
+    time.sleep(0.1)
+    shutil.copyfile((app.srcdir / "test_new.xxx"), (app.srcdir / "test.bib"))
+    app = make_app(*args, **kwargs)
+    app.build()
+    assert app.bibtex_entries_changed == [({"test3"}, {"test2"}, set())]
+    assert app.bibtex_entries_changed_titles == {
+        "test2": "Two, Revised",
+        "test3": "Three",
+    }
+
+
+@pytest.mark.sphinx(
+    "html",
+    testroot="bibfiles_multiple_keys",
+    freshenv=True,
+    confoverrides={"bibtex_parse_background": True},
+)
+def test_bibfiles_parse_background(app, status, warning) -> None:
+    app.build()
+    # messages from the background process are reported
+    assert re.search(status_parsing, status.getvalue()) is not None
+    assert (
+        re.search(
+            "bibliography data error in .*: repeated bibliography entry: test",
+            warning.getvalue(),
+        )
+        is not None
+    )
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(label="1", text=".*Test one.*").search(output)
+    assert app.env.get_domain("cite").data["bibdata"].token
+
+
+@pytest.mark.sphinx("html", testroot="bibfiles_json", freshenv=True)
+def test_bibfiles_json(app, warning) -> None:
+    app.build()
+    assert not warning.getvalue()
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(
+        label="1",
+        text="Aa.Bro and World Health Organization. "
+        "Fifty % of r&amp;d. <em>Journal of Akkerdju</em>, March 2000.",
+    ).search(output)
+    assert html_citations(label="2", text="Cc.Dude. Records.*BibJSON.*").search(
+        output
+    )
+    assert html_citations(
+        label="3", text="Ludwig.van.Beethoven. <em>Book</em>. Publisher, 2001."
+    ).search(output)
+    assert "https://doi.org/10.1000/182" in output
+
+
+# Test that json records without an id, or with a repeated id,
+# are reported and skipped without dropping the other records.
+@pytest.mark.sphinx("html", testroot="bibfiles_json_data_error", freshenv=True)
+def test_bibfiles_json_data_error(app, warning) -> None:
+    app.build()
+    assert warning.getvalue().count("bibliography data error") == 2
+    assert "bibliography entry without id" in warning.getvalue()
+    assert "repeated bibliography entry: GOOD" in warning.getvalue()
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(text=".*Good entry.*").search(output)
+    assert html_citations(text=".*Later entry.*").search(output)
+    assert "Duplicate" not in output
+    assert "No identifier" not in output
+
+
+def test_bibfiles_json_edge_cases(tmp_path) -> None:
+    (tmp_path / "csl.json").write_text(
+        '[{"id": "season", "issued": {"date-parts": [[2020, 21]]}},'
+        ' {"id": "zero", "issued": {"date-parts": [[2020, 0]]}},'
+        ' {"id": "empty", "issued": {"date-parts": []}}]'
+    )
+    (tmp_path / "bibjson.json").write_text(
+        '{"records": [{"id": "rec", "open": true, "volume": 3,'
+        ' "link": [{"anchor": "none"}]}]}'
+    )
+    bibfilenames = [str(tmp_path / "csl.json"), str(tmp_path / "bibjson.json")]
+    entries = parse_bibdata(bibfilenames, "utf-8").data.entries
+    assert dict(entries["season"].fields) == {"year": "2020"}
+    assert dict(entries["zero"].fields) == {"year": "2020"}
+    assert dict(entries["empty"].fields) == {}
+    assert dict(entries["rec"].fields) == {"volume": "3"}
+
+
 @pytest.mark.sphinx("html", testroot="bibfiles_subfolder")
 def test_bibfiles_subfolder(app, warning) -> None:
     app.build()
@@ -119,12 +729,12 @@ def test_bibfiles_multiple_macros(app, warning) -> None:
     assert html_citations(label="1", text=r".*Rev\. Mod\. Phys\..*").search(output)
 
 
-@pytest.mark.sphinx("html", testroot="bibfiles_multiple_keys")
+@pytest.mark.sphinx("html", testroot="bibfiles_multiple_keys", freshenv=True)
 def test_bibfiles_multiple_keys(app, warning) -> None:
     app.build()
     assert (
         re.search(
-            "bibliography data error in .*: repeated bibliograhpy entry: test",
+            "bibliography data error in .*: repeated bibliography entry: test",
             warning.getvalue(),
         )
         is not None
@@ -133,9 +743,22 @@ def test_bibfiles_multiple_keys(app, warning) -> None:
     assert html_citations(label="1", text=".*Test one.*").search(output)
 
 
-# https://bitbucket.org/pybtex-devs/pybtex/issues/441/author-editor-fields-not-resolved-via
-@pytest.mark.xfail(reason="pybtex bug")
 @pytest.mark.sphinx("html", testroot="bibfiles_crossref")
 def test_bibfiles_crossref(app, warning) -> None:
     app.build()
     assert not warning.getvalue()
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(text=".*Srivastava.*Statistical Modeling.*").search(output)
+
+
+@pytest.mark.sphinx(
+    "html",
+    testroot="bibfiles_crossref",
+    freshenv=True,
+    confoverrides={"bibtex_lazy_parsing": True},
+)
+def test_bibfiles_crossref_lazy(app, warning) -> None:
+    app.build()
+    assert not warning.getvalue()
+    output = (app.outdir / "index.html").read_text()
+    assert html_citations(text=".*Srivastava.*Statistical Modeling.*").search(output)
@@ -9,6 +9,8 @@ from typing import Set
 
 import pytest
 
+from sphinxcontrib.bibtex.richtext import text_from_latex
+
 
 def citation_refs(output) -> Set[str]:
     return {match.group("label") for match in html_citation_refs().finditer(output)}
@@ -33,6 +35,18 @@ def test_bibliography_header(app, warning) -> None:
     assert "Footnote Citations" in output
 
 
+@pytest.mark.sphinx("html", testroot="bibliography_header", freshenv=True)
+def test_bibliography_formatted_entries(app, warning) -> None:
+    app.build()
+    assert not warning.getvalue()
+    # regular and footnote citations share one cache
+    formatted_entries = app.env.get_domain("cite").formatted_entries
+    assert {key for _, _, key in formatted_entries} == {"1986:lorenc", "2009:mandel"}
+    # field values are parsed into rich text only once
+    entry = app.env.get_domain("cite").bibdata.data.entries["1986:lorenc"]
+    assert entry.rich_fields["journal"] is text_from_latex(entry.fields["journal"])
+
+
 @pytest.mark.sphinx(
     "pseudoxml",
     testroot="bibliography_empty",
@@ -272,3 +286,19 @@ def test_bibliography_custom_ids(app, warning) -> None:
     assert match1.group("id_") == "footcite-id-2003-evensen"
     assert match2.group("id_") == "footcite-id-2009-mandel"
     assert match3.group("id_") == "footcite-id-1986-lorenc"
+
+
+# ids are only made for included citations, so bibliographies
+# with distinct citations do not need bibliography_count
+@pytest.mark.sphinx(
+    "html",
+    testroot="bibliography_custom_ids",
+    freshenv=True,
+    confoverrides={"bibtex_cite_id": "cite-id-{key}"},
+)
+def test_bibliography_custom_ids_no_count(app, warning) -> None:
+    app.build()
+    assert not warning.getvalue()
+    output = (app.outdir / "index.html").read_text(encoding="utf-8")
+    ids = {match.group("id_") for match in html_citations().finditer(output)}
+    assert ids == {"cite-id-2009-mandel", "cite-id-2003-evensen", "cite-id-1986-lorenc"}
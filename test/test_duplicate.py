@@ -3,6 +3,9 @@
 from test.common import html_citation_refs, html_citations
 
 import pytest
+from pybtex.database import Entry, Person
+
+from sphinxcontrib.bibtex.duplicates import find_duplicates
 
 
 @pytest.mark.sphinx("html", testroot="duplicate_label")
@@ -45,6 +48,64 @@ def test_duplicate_nearly_identical_entries(app, warning) -> None:
     )
 
 
+@pytest.mark.sphinx(
+    "html",
+    testroot="duplicate_nearly_identical_entries",
+    freshenv=True,
+    confoverrides={"bibtex_check_duplicates": True},
+)
+def test_duplicate_nearly_identical_entries_check(app, warning) -> None:
+    app.build()
+    warning.seek(0)
+    warnings = list(warning.readlines())
+    assert len(warnings) == 1
+    assert "possible duplicate entries: ABC_R1, ABC_R2" in warnings[0]
+
+
+def test_find_duplicates() -> None:
+    def entry(title: str, author: str, year: str) -> Entry:
+        return Entry(
+            "article",
+            fields={"title": title, "year": year},
+            persons={"author": [Person(author)]},
+        )
+
+    entries = {
+        "a": entry("On the Theory of Everything", "Smith, John", "2001"),
+        "b": entry("A Completely Different Paper", "Jones, Ann", "2001"),
+        "c": entry("On the theory of {Everything}.", "Smith, J.", "2001"),
+        "d": entry("On the Theory of Everthing", "Smith, John", "2001"),
+        "e": entry("On the Theory of Everything", "Smith, John", "2002"),
+        "f": entry("A completely different paper", "Jones, A.", "2001"),
+    }
+    assert find_duplicates(entries) == [("a", "c", "d"), ("b", "f")]
+
+
+def test_find_duplicates_large_bucket() -> None:
+    entries = {
+        "key%d" % i: Entry(
+            "article",
+            fields={"title": "On the Theory of Everything %d" % i, "year": "2001"},
+            persons={"author": [Person("Smith, John")]},
+        )
+        for i in range(100)
+    }
+    assert find_duplicates(entries) == [tuple(entries)]
+
+
+@pytest.mark.sphinx(
+    "html",
+    testroot="duplicate_nearly_identical_entries",
+    freshenv=True,
+    confoverrides={"bibtex_check_duplicates": True, "bibtex_lazy_parsing": True},
+)
+def test_duplicate_nearly_identical_entries_check_lazy(app, warning) -> None:
+    app.build()
+    # lazily parsed entries are not checked
+    assert not warning.getvalue()
+    assert app.env.get_domain("cite").bibdata.duplicates == ()
+
+
 @pytest.mark.sphinx("html", testroot="duplicate_nearly_identical_keys", freshenv=True)
 def test_duplicate_nearly_identical_keys_1(app, warning) -> None:
     app.build()
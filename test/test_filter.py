@@ -1,4 +1,13 @@
+import ast
+import shutil
+from typing import Dict, Set
+
 import pytest
+from pybtex.database import BibliographyData, Entry, Person
+
+from sphinxcontrib.bibtex.bibfile import BibData, BibFile
+from sphinxcontrib.bibtex.domain import BibtexDomain, _compile_filter, _FilterContext
+from sphinxcontrib.bibtex.query import EntryIndex, plan_filter
 
 
 @pytest.mark.sphinx("html", testroot="filter")
@@ -69,3 +78,125 @@ def test_filter_option_clash(app, warning) -> None:
 def test_filter_syntax_error(app, warning) -> None:
     app.build()
     assert warning.getvalue().count("syntax error in :filter: expression") == 9
+
+
+def test_filter_compile() -> None:
+    entries = {
+        "Test1": Entry("article", fields={"title": "Relativity", "year": "2001"}),
+        "Test2": Entry("book", fields={"title": "Quanta"}),
+    }
+    context = _FilterContext(entries, "index")
+
+    def keys(filter_: str, cited_docnames=frozenset()):
+        predicate = _compile_filter(ast.parse(filter_))
+        result = []
+        for key in entries:
+            context.set_key(key, set(cited_docnames))
+            if predicate(context):
+                result.append(key)
+        return result
+
+    assert keys('title % "^rel"') == ["Test1"]
+    assert keys('type in {"book", "misc"} or year >= "2001"') == ["Test1", "Test2"]
+    assert keys('key == "test2" and not cited') == ["Test2"]
+    assert keys("docnames & {docname}", {"index"}) == ["Test1", "Test2"]
+    with pytest.raises(ValueError, match="expected a string on left side"):
+        keys('cited % "x"')
+    # invalid expressions are rejected even if they would not be evaluated
+    for filter_ in ['True or title % "("', "True or author is title"]:
+        with pytest.raises(ValueError):
+            _compile_filter(ast.parse(filter_))
+
+
+def test_filter_plan() -> None:
+    entries = {
+        "Smith2001": Entry(
+            "article",
+            fields={"year": "2001", "keywords": "physics, relativity"},
+            persons={"author": [Person("Smith, Jane")]},
+        ),
+        "smithers": Entry("Book", fields={"year": "2015"}),
+        "Jones2016": Entry(
+            "article",
+            fields={"year": "2016", "keywords": "chemistry"},
+            persons={"author": [Person("Jones, Sam"), Person("Smithson, Al")]},
+        ),
+        "Zoë": Entry("misc"),
+    }
+    bibfile = BibFile(
+        mtime=0.0,
+        digest="",
+        keys=dict.fromkeys(entries),
+        data=BibliographyData(entries),
+        macros={},
+        used_macros={},
+        crossrefs={},
+        fingerprints={},
+    )
+    bibdata = BibData(
+        encoding="utf-8", bibfiles={"test.bib": bibfile}, data=bibfile.data
+    )
+    index = EntryIndex()
+    context = _FilterContext(entries, "index")
+
+    def plan(filter_: str):
+        tree = ast.parse(filter_)
+        keys = plan_filter(tree, index, bibdata, {"smithers"})
+        # the plan must include all entries satisfying the filter
+        predicate = _compile_filter(tree)
+        for key in entries:
+            context.set_key(key, {"index"} if key == "smithers" else set())
+            assert not predicate(context) or keys is None or key in keys
+        return keys
+
+    assert plan('type == "article" and year >= "2015"') == {"Jones2016"}
+    assert plan('"2015" < year') == {"Jones2016"}
+    assert plan('year < "2001" or type in {"book", 1}') == {"smithers", "Zoë"}
+    assert plan('key % "^smith"') == {"Smith2001", "smithers", "Zoë"}
+    assert plan('key % "^smit?h"') == {"Smith2001", "smithers", "Zoë"}
+    assert plan('author % "smith"') == {"Smith2001", "Jones2016"}
+    assert plan('keywords % "^physics$"') == {"Smith2001"}
+    assert plan('"chem" in keywords') == {"Jones2016"}
+    assert plan("cited and year") == {"smithers"}
+    assert plan("docname in docnames") == {"smithers"}
+    assert plan('cited or type == "misc"') == {"smithers", "Zoë"}
+    # expressions which cannot be looked up
+    for filter_ in [
+        "not cited",
+        'cited or year != "2001"',
+        'key % "^(smith|jones)"',
+        'title % "rel.*ity"',
+    ]:
+        assert plan(filter_) is None
+    # entries which are not looked at would not be reported
+    tree = ast.parse('type == "article" and cited % "x"')
+    assert plan_filter(tree, index, bibdata, set()) is None
+    assert index.get_bibfiles(bibdata, "Smith2001") == ["test.bib"]
+    assert index.get_bibfiles(bibdata, "nokey") == []
+
+
+@pytest.mark.sphinx("html", testroot="filter_cache")
+def test_filter_cache(make_app, app_params, monkeypatch) -> None:
+    filtered = []
+    filter_keys = BibtexDomain._filter_keys
+
+    def _filter_keys(self, bibliography_key, *args):
+        filtered.append(bibliography_key.docname)
+        return filter_keys(self, bibliography_key, *args)
+
+    monkeypatch.setattr(BibtexDomain, "_filter_keys", _filter_keys)
+    args, kwargs = app_params
+    app = make_app(*args, **kwargs)
+    app.build()
+    assert sorted(filtered) == ["doc1", "doc2"]
+    # only bibliographies whose filter refers to changed citations are filtered
+    filtered.clear()
+    shutil.copyfile((app.srcdir / "doc1_new.xxx"), (app.srcdir / "doc1.rst"))
+    app = make_app(*args, **kwargs)
+    app.build()
+    assert filtered == ["doc1"]
+    domain = app.env.get_domain("cite")
+    keys: Dict[str, Set[str]] = {"doc1": set(), "doc2": set()}
+    for citation in domain.citations:
+        keys[citation.bibliography_key.docname].add(citation.key)
+    assert keys == {"doc1": {"first", "third"}, "doc2": {"first", "second"}}
@@ -1,6 +1,7 @@
 """Test for parallel build."""
 
 import os
+from typing import Dict, Set
 
 import pytest
 from sphinx.util.parallel import parallel_available
@@ -34,3 +35,10 @@ def test_parallel(make_app, app_params) -> None:
     app1._warning.truncate()
     app1.build()
     assert not app1._warning.getvalue()
+    # documents citing each key must match the citation references
+    domain = app1.env.get_domain("cite")
+    cited_docnames: Dict[str, Set[str]] = {}
+    for citation_ref in domain.citation_refs:
+        for target in citation_ref.targets:
+            cited_docnames.setdefault(target.key, set()).add(citation_ref.docname)
+    assert domain.cited_docnames == cited_docnames
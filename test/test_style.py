@@ -48,6 +48,16 @@ def test_style_names() -> None:
     assert rich_name.render_as("text") == "Last"
 
 
+def test_style_names_cached() -> None:
+    style = BasicAuthorYearTextualReferenceStyle()
+    text = style.person.format(Person("First Last"))
+    assert text.render_as("text") == "Last"
+    # same name but different person instance, so cache is keyed on name
+    assert style.person.format(Person("Last, First")) is text
+    assert style.person.format(Person("First Other")) is not text
+    assert len(style.person.formatted_names) == 2
+
+
 def test_style_names_no_author() -> None:
     entry = Entry(type_="book")
     with pytest.raises(FieldIsMissing):
@@ -1,4 +1,7 @@
-from sphinxcontrib.bibtex.style.template import join, join2, sentence
+from pybtex.database import Entry
+
+from sphinxcontrib.bibtex.richtext import RichFields, text_from_latex
+from sphinxcontrib.bibtex.style.template import field, join, join2, sentence
 
 
 def test_join() -> None:
@@ -39,3 +42,12 @@ def test_sentence() -> None:
         str(sentence(capfirst=True, other=" and more")["uno", "dos", "tres"].format())
         == "Uno and more."
     )
+
+
+def test_field() -> None:
+    entry = Entry("article", fields={"journal": "J. {Akkerdju}", "year": "2020"})
+    assert str(field("journal").format_data({"entry": entry})) == "J. Akkerdju"
+    entry.rich_fields = RichFields(entry.fields)
+    text = field("journal").format_data({"entry": entry})
+    assert text is text_from_latex("J. {Akkerdju}")
+    assert field("journal", raw=True).format_data({"entry": entry}) == "J. {Akkerdju}"